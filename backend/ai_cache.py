@@ -0,0 +1,129 @@
+"""
+Persistent cache of OpenAI results, keyed by what was actually sent.
+
+The key is a SHA-256 of the model, the call parameters and the prompt after
+whitespace/Unicode normalisation, so clicking "optimize" twice on the same
+draft, or asking for a cover with the same name/category/description,
+reuses the first answer instead of paying for another round trip.
+
+Entries live in a small SQLite file so they survive restarts; each has a
+TTL and the table is trimmed to ``max_entries`` by least-recent use.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", str(Path(__file__).resolve().parent / "ai_cache.sqlite3"))
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", str(7 * 24 * 3600)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalise_prompt(text) -> str:
+    """NFC + collapsed whitespace; case is kept because it changes the copy."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", str(text or ""))).strip()
+
+
+def cache_key(kind: str, model: str, params: dict, prompt) -> str:
+    """Hash of everything that determines the upstream answer.
+
+    ``prompt`` may be a string or a list of chat messages.
+    """
+    if isinstance(prompt, (list, tuple)):
+        prompt = [{**m, "content": normalise_prompt(m.get("content"))} for m in prompt]
+    else:
+        prompt = normalise_prompt(prompt)
+    payload = json.dumps(
+        {"kind": kind, "model": model, "params": params, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AiResultCache:
+    def __init__(self, path=AI_CACHE_PATH, ttl=AI_CACHE_TTL, max_entries=AI_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ai_results (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_results_last_used ON ai_results (last_used)")
+
+        self.hits = {}
+        self.misses = {}
+        self.evictions = 0
+
+    def get(self, kind: str, key: str):
+        """Return the cached value for ``key`` or ``None`` (expired entries count as misses)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM ai_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM ai_results WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses[kind] = self.misses.get(kind, 0) + 1
+                return None
+            self._conn.execute("UPDATE ai_results SET last_used = ? WHERE key = ?", (now, key))
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+        return json.loads(row[0])
+
+    def put(self, kind: str, key: str, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ai_results (key, kind, value, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM ai_results").fetchone()[0]
+            if count > self.max_entries:
+                cur = self._conn.execute(
+                    "DELETE FROM ai_results WHERE key IN "
+                    "(SELECT key FROM ai_results ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.evictions += cur.rowcount
+
+    def discard(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM ai_results WHERE key = ?", (key,))
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ai_results").fetchone()[0]
+            kinds = sorted(set(self.hits) | set(self.misses))
+            by_kind = {}
+            for kind in kinds:
+                hits = self.hits.get(kind, 0)
+                misses = self.misses.get(kind, 0)
+                by_kind[kind] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                }
+            return {"entries": entries, "evictions": self.evictions, "by_kind": by_kind}
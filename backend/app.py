@@ -1,46 +1,188 @@
+if __name__ == "__main__":
+    # `python app.py`: patch blocking I/O the way gunicorn's eventlet worker
+    # does; the Redis message queue listener needs it.
+    import eventlet
+
+    eventlet.monkey_patch()
+
 import json
 import os
-import re
 import uuid
-import requests
 import base64
+import time
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import quote as url_quote
 
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, wrap_file
+import openai
 from openai import OpenAI
 
-from db import get_conn
+from ai_cache import AiResultCache, cache_key
+from bulk import INSERT_COLUMNS, INSERT_SQL, BulkFormatError, detect_format, export_rows, import_records, iter_records
+from cover_images import OpenAIImageProvider, StubImageProvider
+from db import SSDictCursor, get_conn, pool_stats
+from fake_openai import FakeOpenAI
+from invalidation import InvalidationBus
+from images import InvalidImage, make_rendition, offload, pick_width, rendition_name
+from jobs import ClientLimitExceeded, JobQueue, JobQueueFull
+from knowledge_base import KB_HEADER, KnowledgeBase, RetrievalIndex, format_business_line
+from metrics import REGISTRY, LatencyTracker, add_span, finish_trace, span, start_trace
+from response_cache import ResponseCache
+from search_index import SearchIndex
+from upload_store import UploadStore
+from upstream import RateLimiter, Upstream
+from validation import ALLOWED_STATUSES, BUSINESS_SCHEMA, error_message, sanitize_text
+from video_meta import VideoMetaFetcher
 
 load_dotenv()
 
 app = Flask(__name__)
 allowed_origins = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "*").split(",") if o.strip()]
 CORS(app, resources={r"/*": {"origins": allowed_origins if allowed_origins else "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*")
+# Several workers share Socket.IO rooms/emits through this queue (e.g. redis://127.0.0.1:6379/0).
+SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE") or None
+socketio = SocketIO(app, cors_allowed_origins="*", message_queue=SOCKETIO_MESSAGE_QUEUE)
 
 # OpenAI Config
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_IMAGE_MODEL = os.getenv("OPENAI_IMAGE_MODEL", "dall-e-3")
 OPENAI_IMAGE_SIZE = os.getenv("OPENAI_IMAGE_SIZE", "1792x1024")
-openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-
-ALLOWED_DISCOUNTS = {"N/A", "5%", "10%", "15%", "20%", "25%", "30%", "40%", "50%"}
-ALLOWED_IMAGE_EXT = {"png", "jpg", "jpeg"}
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "20"))
+OPENAI_IMAGE_TIMEOUT = float(os.getenv("OPENAI_IMAGE_TIMEOUT", "90"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "1"))
+openai_client = (
+    OpenAI(api_key=OPENAI_API_KEY, timeout=OPENAI_TIMEOUT, max_retries=OPENAI_MAX_RETRIES)
+    if OPENAI_API_KEY else None
+)
+COVER_IMAGE_PROVIDER = os.getenv("COVER_IMAGE_PROVIDER", "openai").lower()
+if COVER_IMAGE_PROVIDER == "stub":
+    cover_provider = StubImageProvider(OPENAI_IMAGE_SIZE, delay=float(os.getenv("COVER_STUB_DELAY", "0")))
+elif openai_client is not None:
+    cover_provider = OpenAIImageProvider(
+        openai_client.with_options(timeout=OPENAI_IMAGE_TIMEOUT), OPENAI_IMAGE_MODEL, OPENAI_IMAGE_SIZE
+    )
+else:
+    cover_provider = None
+CHAT_PROVIDER = os.getenv("CHAT_PROVIDER", "openai").lower()
+if CHAT_PROVIDER == "stub":
+    chat_client = FakeOpenAI(delay=float(os.getenv("CHAT_STUB_DELAY", "0")))
+else:
+    chat_client = openai_client
+
+
+def is_openai_outage(exc) -> bool:
+    """Only timeouts, connection errors, 429 and 5xx say OpenAI itself is degraded."""
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, openai.APIConnectionError)
+
+
+# Upstream guard rails: one eventlet worker serves every socket, so slow
+# upstreams are capped and fail fast instead of piling up on the hub.
+openai_upstream = Upstream(
+    "openai", max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")), is_failure=is_openai_outage
+)
+image_upstream = Upstream(
+    "openai_images", max_concurrency=int(os.getenv("OPENAI_IMAGE_MAX_CONCURRENCY", "2")), is_failure=is_openai_outage
+)
+oembed_upstream = Upstream("oembed", max_concurrency=int(os.getenv("OEMBED_MAX_CONCURRENCY", "4")))
+chat_session_limiter = RateLimiter(
+    per_minute=float(os.getenv("CHAT_SESSION_RATE_PER_MIN", "10")),
+    burst=int(os.getenv("CHAT_SESSION_RATE_BURST", "3")),
+)
+ai_ip_limiter = RateLimiter(
+    per_minute=float(os.getenv("AI_IP_RATE_PER_MIN", "30")),
+    burst=int(os.getenv("AI_IP_RATE_BURST", "10")),
+)
+
+ALLOWED_IMAGE_EXT = {"png", "jpg", "jpeg", "webp"}
 MAX_IMAGE_BYTES = 5 * 1024 * 1024
+# Uploads are named after their content hash, so clients may cache them forever.
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# "sendfile": stream from this process via wsgi.file_wrapper (gunicorn uses sendfile(2)).
+# "accel": answer with X-Accel-Redirect and let nginx send the bytes (see nginx.conf).
+UPLOAD_SERVE_MODE = os.getenv("UPLOAD_SERVE_MODE", "sendfile").lower()
+UPLOAD_ACCEL_PREFIX = os.getenv("UPLOAD_ACCEL_PREFIX", "/_uploads/")
 SKIP_DB_WRITE = os.getenv("SKIP_DB_WRITE", "").lower() in {"1", "true", "yes"}
 
 BASE_DIR = Path(__file__).resolve().parent
-UPLOAD_DIR = BASE_DIR / "uploads"
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR") or BASE_DIR / "uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+upload_store = UploadStore(UPLOAD_DIR)
+
+knowledge_base = KnowledgeBase()
+retrieval_index = RetrievalIndex(knowledge_base)
+search_index = SearchIndex(None if SKIP_DB_WRITE else knowledge_base)
+response_cache = ResponseCache()
+ai_cache = AiResultCache()
+chat_ttft = LatencyTracker()
+chat_duration = LatencyTracker()
+
+# Writes go through the bus so every worker drops its cached copies, not only this one.
+invalidation = InvalidationBus(os.getenv("INVALIDATION_URL") or SOCKETIO_MESSAGE_QUEUE)
+
+
+def invalidate_businesses(deleted_id=None):
+    knowledge_base.invalidate(deleted_id=deleted_id)
+    response_cache.invalidate("businesses")
+
+
+invalidation.on("businesses", invalidate_businesses)
+invalidation.on("videos", lambda: response_cache.invalidate("videos"))
+invalidation.start()
+
+# Prometheus metrics (GET /metrics); the DB query metrics live in db.py.
+http_latency = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route", "method", "status")
+)
+openai_latency = REGISTRY.histogram(
+    "openai_request_duration_seconds", "OpenAI call latency (streams: until the last chunk)", ("operation", "outcome")
+)
+openai_tokens = REGISTRY.counter("openai_tokens_total", "Tokens reported by OpenAI", ("operation", "kind"))
+chat_ttft_seconds = REGISTRY.histogram("chat_ttft_seconds", "Chat message to first streamed token")
+upload_bytes = REGISTRY.counter("upload_bytes_total", "Bytes received as uploads or generated as covers", ("kind",))
+socket_sessions = REGISTRY.gauge("socketio_sessions", "Connected Socket.IO sessions")
+
+
+def record_openai(operation, started, outcome="ok", usage=None):
+    elapsed = time.monotonic() - started
+    openai_latency.observe(elapsed, operation, outcome)
+    if usage is not None:
+        openai_tokens.inc(operation, "prompt", amount=getattr(usage, "prompt_tokens", 0) or 0)
+        openai_tokens.inc(operation, "completion", amount=getattr(usage, "completion_tokens", 0) or 0)
+    add_span(f"openai.{operation}", elapsed, outcome=outcome)
+
+
+def call_openai(operation, upstream, fn, *args, **kwargs):
+    """``upstream.call(fn, ...)`` recording its latency and token usage under ``operation``."""
+    started = time.monotonic()
+    outcome = "error"
+    response = None
+    try:
+        response = upstream.call(fn, *args, **kwargs)
+        outcome = "ok"
+        return response
+    finally:
+        record_openai(operation, started, outcome, getattr(response, "usage", None))
+
+
+def save_video_meta(video_id, meta):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE videos SET title = %s, thumbnail_url = %s WHERE id = %s",
+                (meta["title"], meta["thumbnail_url"], video_id),
+            )
 
 
-def strip_html(text: str) -> str:
-    return re.sub(r"<[^>]*>", "", text or "")
+video_meta = VideoMetaFetcher(
+    save_video_meta, upstream=oembed_upstream, on_done=lambda: invalidation.publish("videos")
+)
 
 
 def build_public_url(filename: str) -> str:
@@ -48,26 +190,6 @@ def build_public_url(filename: str) -> str:
     return f"{host}/uploads/{filename}"
 
 
-def sanitize_text(text: str, max_len: int = 255) -> str:
-    cleaned = strip_html(text)
-    cleaned = re.sub(r'[^\w\s.,;:!?\'"()-]', "", cleaned, flags=re.UNICODE)
-    return cleaned.strip()[:max_len]
-
-
-def validate_email(email: str) -> bool:
-    return bool(re.match(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$", email or ""))
-
-def validate_phone(phone: str) -> bool:
-    return bool(re.match(r"^[0-9+()\s-]{7,20}$", phone or ""))
-
-def validate_discount(discount: str) -> bool:
-    return discount in ALLOWED_DISCOUNTS
-
-def validate_website(url: str) -> bool:
-    if not url:
-        return True
-    return bool(re.match(r"^https?://", url))
-
 def mock_businesses():
     now = datetime.utcnow().isoformat()
     return [
@@ -92,55 +214,30 @@ def mock_businesses():
         }
     ]
 
-# Helper for videos
-def fetch_oembed_data(url: str):
-    if not url: return None
-    if "youtube.com" not in url and "youtu.be" not in url:
-        return {"title": "External Video", "thumbnail_url": None}
-    try:
-        res = requests.get(f"https://noembed.com/embed?url={url}", timeout=5)
-        if res.status_code == 200:
-            d = res.json()
-            return {"title": d.get("title", "Untitled"), "thumbnail_url": d.get("thumbnail_url")}
-    except Exception as e:
-        print(f"OEmbed Error: {e}")
-    return {"title": "Untitled Video", "thumbnail_url": None}
+
+if SKIP_DB_WRITE:
+    search_index.replace(mock_businesses())
 
 
 # --- AI & KNOWLEDGE BASE LOGIC ---
 
-def build_knowledge_base():
+def build_knowledge_base(query=None):
     """
     Convierte la base de datos SQL en un contexto de texto 'digerible' para OpenAI.
+    El texto sale de la cache en memoria (``knowledge_base``), que solo relee
+    las filas modificadas desde la ultima vez. Con ``query`` solo se incluyen
+    los negocios mas relevantes (top-k del indice TF-IDF).
     """
     if SKIP_DB_WRITE:
-        businesses = mock_businesses()
-    else:
-        try:
-            with get_conn() as conn:
-                with conn.cursor() as cur:
-                    # Solo obtenemos lo necesario para ahorrar tokens
-                    cur.execute("""
-                        SELECT business_name, category, description, discount, email, phone, website 
-                        FROM businesses 
-                        WHERE status != 'rejected'
-                    """)
-                    businesses = cur.fetchall()
-        except Exception:
-            # Fallback a mock si la DB falla
-            businesses = mock_businesses()
-
-    context_text = "Directorio de Negocios de Welfare School:\n\n"
-    for b in businesses:
-        # Si es un dict (mock) o row (real db), manejamos ambos
-        name = b.get('business_name') if isinstance(b, dict) else b['business_name']
-        cat = b.get('category') if isinstance(b, dict) else b['category']
-        desc = b.get('description') if isinstance(b, dict) else b['description']
-        disc = b.get('discount') if isinstance(b, dict) else b['discount']
-        
-        context_text += f"- **{name}** ({cat}): {desc}. [Descuento: {disc}]\n"
-    
-    return context_text
+        return KB_HEADER + "".join(format_business_line(b) for b in mock_businesses())
+    try:
+        if query:
+            return retrieval_index.context_for(query)
+        return knowledge_base.text()
+    except Exception as e:
+        # Fallback a mock si la DB falla
+        print(f"Knowledge Base Error: {e}")
+        return KB_HEADER + "".join(format_business_line(b) for b in mock_businesses())
 
 @socketio.on('chat_message')
 def handle_chat(data):
@@ -149,9 +246,25 @@ def handle_chat(data):
     if not user_query:
         return
 
+    message_id = uuid.uuid4().hex
+    started = time.monotonic()
+    openai_started = None
+    parts = []
+    start_trace("chat_message")
+    if not chat_session_limiter.allow(request.sid) or not ai_ip_limiter.allow(client_ip()):
+        emit('chat_response_done', {
+            'message_id': message_id,
+            'message': "Estas enviando mensajes muy rapido. Espera unos segundos e intenta de nuevo.",
+            'error': True,
+            'rate_limited': True,
+        })
+        finish_trace(rate_limited=True)
+        return
+
     try:
-        # 1. Construir el contexto (La base de conocimientos)
-        knowledge_context = build_knowledge_base()
+        # 1. Construir el contexto (solo los negocios relevantes para la consulta)
+        with span("knowledge_base"):
+            knowledge_context = build_knowledge_base(user_query)
 
         # 2. Configurar el Prompt del Sistema
         system_prompt = f"""
@@ -161,31 +274,91 @@ def handle_chat(data):
         {knowledge_context}
 
         INSTRUCCIONES:
-        1. Responde solo basándote en la lista de negocios anterior.
+        1. Responde solo basándote en la lista de negocios anterior (son los más relevantes para la consulta).
         2. Si te preguntan por un servicio (ej. "dentista"), busca en la lista y recomienda las opciones disponibles.
         3. Sé amable, conciso y profesional.
         4. Si no encuentras información en la lista, di que no hay negocios registrados en esa categoría aún.
         """
 
-        # 3. Llamar a OpenAI
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo", # O gpt-4-turbo si prefieres
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_query}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
-
-        ai_reply = response.choices[0].message.content
+        # 3. Llamar a OpenAI en modo stream y reenviar cada fragmento al cliente
+        usage = None
+        openai_started = time.monotonic()
+        with openai_upstream.slot():
+            stream = chat_client.chat.completions.create(
+                model="gpt-3.5-turbo", # O gpt-4-turbo si prefieres
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_query}
+                ],
+                temperature=0.7,
+                max_tokens=300,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
 
-        # 4. Enviar respuesta al cliente
-        emit('chat_response', {'message': ai_reply})
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if not parts:
+                    ttft = time.monotonic() - started
+                    chat_ttft.observe(ttft)
+                    chat_ttft_seconds.observe(ttft)
+                parts.append(delta)
+                emit('chat_response_chunk', {'message_id': message_id, 'delta': delta})
+                # Let the eventlet hub flush this frame before waiting on the next delta.
+                socketio.sleep(0)
+
+        record_openai("chat", openai_started, usage=usage)
+        openai_started = None
+
+        # 4. Cerrar el mensaje con el texto completo
+        chat_duration.observe(time.monotonic() - started)
+        emit('chat_response_done', {'message_id': message_id, 'message': "".join(parts)})
 
     except Exception as e:
         print(f"Error en AI Socket: {e}")
-        emit('chat_response', {'message': "Lo siento, tuve un problema procesando tu solicitud. Por favor intenta de nuevo."})
+        if openai_started is not None:
+            record_openai("chat", openai_started, "error")
+        emit('chat_response_done', {
+            'message_id': message_id,
+            'message': "".join(parts) or "Lo siento, tuve un problema procesando tu solicitud. Por favor intenta de nuevo.",
+            'error': True,
+        })
+    finally:
+        finish_trace(message_id=message_id, chunks=len(parts))
+
+
+@socketio.on('connect')
+def handle_connect(auth=None):
+    socket_sessions.inc()
+
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    socket_sessions.dec()
+    chat_session_limiter.forget(request.sid)
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    start_trace("http")
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        status = str(response.status_code)
+        http_latency.observe(time.perf_counter() - started, route, request.method, status)
+        finish_trace(route=route, method=request.method, status=status)
+    return response
 
 
 # --- ROUTES ---
@@ -210,8 +383,7 @@ def optimize_profile():
     if not description:
         return jsonify({"error": "Description is required"}), 400
 
-    try:
-        system_prompt = """
+    system_prompt = """
         You are an expert copywriter for a community business directory. 
         Your task is to improve a business description to be more professional, engaging, and trustworthy.
         Keep the description concise (max 450 characters).
@@ -224,14 +396,27 @@ def optimize_profile():
         }
         """
 
-        user_prompt = f"Business Name: {name}\nCategory: {category}\nDraft Description: {description}"
+    user_prompt = f"Business Name: {name}\nCategory: {category}\nDraft Description: {description}"
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    # A cached answer costs no OpenAI call, so it does not count against the limit.
+    key = cache_key("optimize", "gpt-3.5-turbo", {"temperature": 0.7, "max_tokens": 400}, messages)
+    cached = ai_cache.get("optimize", key)
+    if cached is not None:
+        return jsonify(cached), 200
+
+    if not ai_ip_limiter.allow(client_ip()):
+        return jsonify({"error": "Too many AI requests, try again in a moment"}), 429
 
-        response = openai_client.chat.completions.create(
+    try:
+        response = call_openai(
+            "optimize",
+            openai_upstream,
+            openai_client.chat.completions.create,
             model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+            messages=messages,
             temperature=0.7,
             max_tokens=400
         )
@@ -241,6 +426,7 @@ def optimize_profile():
         content = content.replace("```json", "").replace("```", "").strip()
         
         result = json.loads(content)
+        ai_cache.put("optimize", key, result)
         return jsonify(result), 200
 
     except Exception as e:
@@ -253,9 +439,33 @@ def optimize_profile():
         }), 200
 
 
+def client_ip() -> str:
+    # Behind nginx every request comes from 127.0.0.1; nginx forwards the real one.
+    return request.headers.get("X-Real-IP") or request.remote_addr or "unknown"
+
+
+def render_cover(prompt: str, host_url: str, key: str) -> dict:
+    """Job body: generate the image and save it under ``uploads/``."""
+    image_bytes = call_openai("cover", image_upstream, cover_provider.generate, prompt)
+    upload_bytes.inc("cover", amount=len(image_bytes))
+    safe_name = upload_store.save_bytes(image_bytes)
+    ai_cache.put("cover", key, {"filename": safe_name})
+    return {"cover_url": f"{host_url.rstrip('/')}/uploads/{safe_name}"}
+
+
+def notify_job_done(job):
+    sid = job.meta.get("socket_id")
+    if sid:
+        socketio.emit("cover_job_done", job.to_dict(), to=sid)
+
+
+cover_jobs = JobQueue(on_done=notify_job_done, error_message="Cover generation failed")
+
+
 @app.route("/ai/generate-cover", methods=["POST"])
 def generate_cover():
-    if openai_client is None:
+    """Queues a cover generation job; poll ``/ai/jobs/<job_id>`` for the result."""
+    if cover_provider is None:
         return jsonify({"error": "OPENAI_API_KEY is not configured"}), 500
 
     data = request.get_json(silent=True) or {}
@@ -279,46 +489,104 @@ def generate_cover():
             f"Description: {description or 'N/A'}."
         )
 
+    host_url = request.host_url
+    key = cache_key("cover", cover_provider.model, {"size": cover_provider.size}, prompt)
+    cached = ai_cache.get("cover", key)
+    if cached is not None:
+        if (UPLOAD_DIR / cached["filename"]).is_file():
+            cover_url = f"{host_url.rstrip('/')}/uploads/{cached['filename']}"
+            return jsonify({"status": "done", "cached": True, "result": {"cover_url": cover_url}}), 200
+        ai_cache.discard(key)
+
+    if not ai_ip_limiter.allow(client_ip()):
+        return jsonify({"error": "Too many AI requests, try again in a moment"}), 429
     try:
-        result = openai_client.images.generate(
-            model=OPENAI_IMAGE_MODEL,
-            prompt=prompt,
-            size=OPENAI_IMAGE_SIZE,
-            response_format="b64_json",
+        job, _ = cover_jobs.submit(
+            lambda: render_cover(prompt, host_url, key),
+            key=key,
+            client=client_ip(),
+            meta={"socket_id": data.get("socket_id")},
         )
-        image_b64 = result.data[0].b64_json
-        image_bytes = base64.b64decode(image_b64)
-    except Exception as e:
-        print(f"Cover AI Error: {e}")
-        return jsonify({"error": "Image generation failed"}), 502
+    except ClientLimitExceeded as e:
+        return jsonify({"error": str(e)}), 429
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+
+    body = job.to_dict()
+    body["status_url"] = f"{request.host_url.rstrip('/')}/ai/jobs/{job.id}"
+    return jsonify(body), 202
 
-    safe_name = f"{uuid.uuid4()}.png"
-    try:
-        (UPLOAD_DIR / safe_name).write_bytes(image_bytes)
-    except Exception as e:
-        print(f"Cover Save Error: {e}")
-        return jsonify({"error": "Failed to save image"}), 500
 
-    return jsonify({"cover_url": build_public_url(safe_name)}), 201
+@app.route("/ai/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = cover_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
 
 
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"}), 200
+    return jsonify({
+        "status": "ok",
+        "db_pool": pool_stats(),
+        "response_cache": response_cache.stats(),
+        "cover_jobs": cover_jobs.stats(),
+        "ai_cache": ai_cache.stats(),
+        "search_index": search_index.stats(),
+        "uploads": upload_store.stats(),
+        "upstream": {u.name: u.stats() for u in (openai_upstream, image_upstream, oembed_upstream)},
+        "video_meta": video_meta.stats(),
+        "invalidation": invalidation.stats(),
+        "rate_limits": {"chat_session": chat_session_limiter.stats(), "ai_ip": ai_ip_limiter.stats()},
+        "chat": {"ttft": chat_ttft.stats(), "duration": chat_duration.stats()},
+    }), 200
+
+
+# The /health counters, as gauges, next to the request/DB/OpenAI histograms.
+REGISTRY.register_stats("db_pool", pool_stats)
+REGISTRY.register_stats("response_cache", response_cache.stats)
+REGISTRY.register_stats("cover_jobs", cover_jobs.stats)
+REGISTRY.register_stats("ai_cache", ai_cache.stats)
+REGISTRY.register_stats("search_index", search_index.stats)
+REGISTRY.register_stats("uploads", upload_store.stats)
+REGISTRY.register_stats("video_meta", video_meta.stats)
+REGISTRY.register_stats("invalidation", invalidation.stats)
+for _upstream in (openai_upstream, image_upstream, oembed_upstream):
+    REGISTRY.register_stats(f"upstream_{_upstream.name}", _upstream.stats)
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus text exposition; restrict it to the scraper (see ``nginx.conf``)."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.route("/videos", methods=["GET"])
+@response_cache.cached("videos")
 def list_videos():
     if SKIP_DB_WRITE:
         return jsonify([]), 200
     try:
         with get_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT id, url, created_at FROM videos ORDER BY created_at DESC")
+                cur.execute("SELECT id, url, title, thumbnail_url, created_at FROM videos ORDER BY created_at DESC")
                 rows = cur.fetchall()
-        return jsonify([{"id": r["id"], "url": r["url"], "created_at": r.get("created_at")} for r in rows]), 200
+        # Rows without metadata are filled in the background; the cache is
+        # invalidated once they are saved, so the next load picks them up.
+        video_meta.backfill([r for r in rows if not r.get("title")])
+        return jsonify([
+            {
+                "id": r["id"],
+                "url": r["url"],
+                "title": r.get("title"),
+                "thumbnail_url": r.get("thumbnail_url"),
+                "created_at": r.get("created_at"),
+            }
+            for r in rows
+        ]), 200
     except Exception:
-        return jsonify([]), 200
+        return jsonify([]), 200, {"Cache-Control": "no-store"}
 
 
 @app.route("/videos", methods=["POST"])
@@ -328,130 +596,230 @@ def add_video():
     if not url:
         return jsonify({"error": "URL required"}), 400
     
+    # Fetched once here and stored; a failure leaves it NULL for the backfill.
+    meta = video_meta.fetch(url) or {"title": None, "thumbnail_url": None}
+
     if SKIP_DB_WRITE:
-        return jsonify({"id": 999, "url": url, "created_at": datetime.utcnow().isoformat()}), 201
+        return jsonify({"id": 999, "url": url, **meta, "created_at": datetime.utcnow().isoformat()}), 201
 
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO videos (url) VALUES (%s) RETURNING id, created_at",
-                (url,)
+                "INSERT INTO videos (url, title, thumbnail_url) VALUES (%s, %s, %s) RETURNING id, created_at",
+                (url, meta["title"], meta["thumbnail_url"])
             )
             row = cur.fetchone()
             new_id = row["id"]
             created_at = row.get("created_at")
-            
-    return jsonify({"id": new_id, "url": url, "created_at": created_at}), 201
+
+    invalidation.publish("videos")
+    return jsonify({"id": new_id, "url": url, **meta, "created_at": created_at}), 201
+
+
+def encode_cursor(created_at, business_id, status=None) -> str:
+    created = created_at.isoformat() if hasattr(created_at, "isoformat") else str(created_at)
+    values = [created, business_id] if status is None else [created, business_id, status]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Returns ``(created_at, id, status)``; ``status`` is only set by the admin queue."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    status = str(values[2]) if len(values) > 2 else None
+    return datetime.fromisoformat(values[0]), str(values[1]), status
+
+
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def split_arg_values(name: str):
+    """Accepts both ``?category=a&category=b`` and ``?category=a,b``."""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v.strip() for v in raw.split(",") if v.strip())
+    return values
+
+
+def business_filters(include_status=True):
+    """WHERE clauses + params for the ``category``/``discount``/``status``/``q`` query args."""
+    where = []
+    params = []
+
+    categories = split_arg_values("category")
+    if categories:
+        where.append(f"category IN ({', '.join(['%s'] * len(categories))})")
+        params.extend(categories)
+    discounts = split_arg_values("discount")
+    if discounts:
+        where.append(f"discount IN ({', '.join(['%s'] * len(discounts))})")
+        params.extend(discounts)
+    statuses = split_arg_values("status") if include_status else []
+    if statuses:
+        where.append(f"status IN ({', '.join(['%s'] * len(statuses))})")
+        params.extend(statuses)
+
+    query = sanitize_text(request.args.get("q", ""), 100)
+    if query:
+        like = f"%{escape_like(query)}%"
+        where.append("(business_name LIKE %s OR category LIKE %s OR description LIKE %s OR tags LIKE %s)")
+        params.extend([like, like, like, like])
+    return where, params
+
+
+def parse_tags(row):
+    tags_val = row.get("tags")
+    if isinstance(tags_val, str):
+        try:
+            row["tags"] = json.loads(tags_val)
+        except Exception:
+            row["tags"] = []
+    elif tags_val is None and "tags" in row:
+        row["tags"] = []
+    return row
+
+
+def public_row(row):
+    """Copy of ``row`` without the contact details the owner chose to hide."""
+    row = parse_tags(dict(row))
+    if not row.get("show_email"):
+        row["email"] = None
+    if not row.get("show_phone"):
+        row["phone"] = None
+    return row
 
 
 @app.route("/businesses", methods=["GET"])
+@response_cache.cached("businesses")
 def list_businesses():
+    """Public listing with filters and keyset pagination over ``(created_at, id)``."""
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 200))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
     if SKIP_DB_WRITE:
         data = mock_businesses()
+        next_cursor = None
     else:
-        limit = min(int(request.args.get("limit", 50)), 200)
+        where, params = business_filters()
+
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                cursor_created, cursor_id, _ = decode_cursor(cursor)
+            except Exception:
+                return jsonify({"error": "Invalid cursor"}), 400
+            where.append("(created_at < %s OR (created_at = %s AND id < %s))")
+            params.extend([cursor_created, cursor_created, cursor_id])
+
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
         with get_conn() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    """
+                    f"""
                     SELECT id, surname, email, show_email, phone, show_phone,
                            business_name, category, discount, description, website,
                            logo_url, background_url, tags, status, created_at, updated_at
                     FROM businesses
-                    ORDER BY created_at DESC
+                    {where_sql}
+                    ORDER BY created_at DESC, id DESC
                     LIMIT %s
                     """,
-                    (limit,),
+                    (*params, limit + 1),
                 )
                 data = cur.fetchall()
 
-    # Filter private info
-    for row in data:
-        if not row.get("show_email"):
-            row["email"] = None
-        if not row.get("show_phone"):
-            row["phone"] = None
-        tags_val = row.get("tags")
-        if isinstance(tags_val, str):
-            try:
-                row["tags"] = json.loads(tags_val)
-            except Exception:
-                row["tags"] = []
-        elif tags_val is None:
-            row["tags"] = []
+        next_cursor = None
+        if len(data) > limit:
+            data = data[:limit]
+            last = data[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
 
-    return jsonify(data), 200
+    return jsonify({"items": [public_row(row) for row in data], "next_cursor": next_cursor}), 200
+
+
+@app.route("/businesses/search", methods=["GET"])
+def search_businesses():
+    """Accent-insensitive word/prefix search answered from the in-memory index.
+
+    ``?mode=and`` (default) needs every word, ``?mode=or`` any; ``?prefix=0``
+    turns off type-ahead matching.
+    """
+    query = sanitize_text(request.args.get("q", ""), 100)
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    mode = request.args.get("mode", "and").lower()
+    if mode not in {"and", "or"}:
+        return jsonify({"error": "mode must be and or or"}), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit", 20)), 200))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    prefix = request.args.get("prefix", "1").lower() not in {"0", "false", "no"}
+
+    started = time.perf_counter()
+    try:
+        total, hits = search_index.search(
+            query, mode=mode, prefix=prefix, limit=limit, categories=set(split_arg_values("category"))
+        )
+    except Exception as e:
+        print(f"Search Error: {e}")
+        return jsonify({"error": "Search is unavailable"}), 503
+    took_ms = round((time.perf_counter() - started) * 1000, 3)
+    items = [dict(public_row(row), score=round(score, 3)) for row, score in hits]
+    return jsonify({"items": items, "total": total, "took_ms": took_ms}), 200
+
+
+# Everything but ``status``: public submissions always start as pending.
+CREATE_FIELDS = frozenset(INSERT_COLUMNS[1:-1])
+
+
+def business_row(values):
+    """Cleaned schema values -> a tuple in ``bulk.INSERT_COLUMNS`` order with a new id."""
+    return (str(uuid.uuid4()), *(values[c] for c in INSERT_COLUMNS[1:-1]), values.get("status", "pending"))
+
+
+def clean_business(data, allow_status=False):
+    """Sanitizes and validates one listing.
+
+    Returns ``(row, {})`` with ``row`` in ``bulk.INSERT_COLUMNS`` order, or
+    ``(None, errors)`` with every invalid field (see ``validation.error_message``).
+    """
+    values, errors = BUSINESS_SCHEMA.clean(data, only=None if allow_status else CREATE_FIELDS)
+    if errors:
+        return None, errors
+    return business_row(values), {}
+
+
+def clean_business_rows(records, allow_status=False):
+    """Batch form of ``clean_business`` for ``(line, data)`` records: yields ``(line, row, error)``."""
+    only = None if allow_status else CREATE_FIELDS
+    for line, values, errors in BUSINESS_SCHEMA.clean_many(records, only=only):
+        if errors:
+            yield line, None, error_message(errors)
+        else:
+            yield line, business_row(values), None
 
 
 @app.route("/businesses", methods=["POST"])
 def create_business():
     data = request.get_json(silent=True) or {}
 
-    required_fields = ["surname", "email", "phone", "business_name", "category", "discount", "description"]
-    missing = [f for f in required_fields if not data.get(f)]
-    if missing:
-        return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
-
-    surname = sanitize_text(data.get("surname"), 120)
-    business_name = sanitize_text(data.get("business_name"), 160)
-    category = sanitize_text(data.get("category"), 120)
-    discount = data.get("discount", "")
-    description = sanitize_text(data.get("description"), 500)
-    website = strip_html(data.get("website", "")).strip()
-    email = strip_html(data.get("email", "")).replace(" ", "").lower()
-    phone = strip_html(data.get("phone", ""))
-    show_email = bool(data.get("show_email"))
-    show_phone = bool(data.get("show_phone"))
-    logo_url = strip_html(data.get("logo_url", "")).strip() or None
-    background_url = strip_html(data.get("background_url", "") or data.get("cover_url", "")).strip() or None
-
-    tags = data.get("tags", [])
-    if not isinstance(tags, list):
-        return jsonify({"error": "tags must be an array"}), 400
-    cleaned_tags = [sanitize_text(str(tag), 40) for tag in tags if sanitize_text(str(tag), 40)]
-    tags_json = json.dumps(cleaned_tags) if cleaned_tags else None
-
-    if not validate_email(email):
-        return jsonify({"error": "Invalid email format"}), 400
-    if not validate_phone(phone):
-        return jsonify({"error": "Invalid phone format"}), 400
-    if not validate_discount(discount):
-        return jsonify({"error": "Invalid discount option"}), 400
-    if not validate_website(website):
-        return jsonify({"error": "Website must start with http:// or https://"}), 400
-
-    business_id = str(uuid.uuid4())
+    row, errors = clean_business(data)
+    if errors:
+        return jsonify({"error": error_message(errors), "errors": errors}), 400
+    business_id = row[0]
 
     if SKIP_DB_WRITE:
         return jsonify({"id": business_id, "status": "pending", "note": "DB write skipped (dev mode)"}), 200
 
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO businesses (
-                    id, surname, email, show_email, phone, show_phone,
-                    business_name, category, discount, description, website,
-                    logo_url, background_url, tags, status
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'pending')
-                """,
-                (
-                    business_id,
-                    surname,
-                    email,
-                    show_email,
-                    phone,
-                    show_phone,
-                    business_name,
-                    category,
-                    discount,
-                    description,
-                    website or None,
-                    logo_url,
-                    background_url,
-                    tags_json,
-                ),
-            )
+            cur.execute(INSERT_SQL, row)
+    invalidation.publish("businesses")
     return jsonify({"id": business_id, "status": "pending"}), 201
 
 
@@ -464,56 +832,266 @@ def upload_logo():
     filename = secure_filename(file.filename or "")
     ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
     if ext not in ALLOWED_IMAGE_EXT:
-        return jsonify({"error": "Only PNG and JPG files are allowed"}), 400
+        return jsonify({"error": "Only PNG, JPG and WebP files are allowed"}), 400
 
     file.seek(0, os.SEEK_END)
     size = file.tell()
     file.seek(0)
     if size > MAX_IMAGE_BYTES:
         return jsonify({"error": "File too large (max 5MB)"}), 400
+    upload_bytes.inc("logo", amount=size)
 
-    safe_name = f"{uuid.uuid4()}.{ext}"
-    dest = UPLOAD_DIR / safe_name
-    file.save(dest)
+    # Stored under the hash of the upload: a file we already have is not decoded again.
+    # New files are re-encoded (real type checked, EXIF stripped) with their renditions.
+    try:
+        safe_name = upload_store.save_upload(file.stream)
+    except InvalidImage as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({"logo_url": build_public_url(safe_name)}), 201
 
 
-@app.route("/uploads/<path:filename>", methods=["GET"])
+@app.route("/uploads/<path:filename>", methods=["GET", "HEAD"])
 def serve_upload(filename):
-    return send_from_directory(UPLOAD_DIR, filename)
+    """Serves an upload; ``?w=`` picks the smallest rendition at least that wide."""
+    meta = upload_store.index.get(filename)
+    if meta is None:
+        return jsonify({"error": "Not found"}), 404
+
+    width = request.args.get("w", type=int)
+    chosen = pick_width(width) if width else None
+    if chosen is not None:
+        name = rendition_name(filename, chosen)
+        rendition = upload_store.index.get(name)
+        if rendition is None:
+            # Files uploaded before the pipeline existed get their rendition on first use
+            # (encoded off the hub, like uploads).
+            try:
+                rendition = upload_store.write(name, offload(make_rendition, meta.path, chosen))
+            except InvalidImage as e:
+                print(f"Rendition Error: {e}")
+            except OSError as e:
+                print(f"Rendition Error: {e}")
+                upload_store.index.discard(filename)
+                return jsonify({"error": "Not found"}), 404
+        meta = rendition or meta
+
+    response = Response(mimetype=meta.mimetype)
+    response.headers["Cache-Control"] = UPLOAD_CACHE_CONTROL
+    response.set_etag(meta.etag)
+    response.last_modified = meta.mtime
+    # Validators come from the index: a revalidation never touches the disk.
+    if request.if_none_match.contains(meta.etag) or (
+        not request.if_none_match and request.if_modified_since
+        and int(meta.mtime) <= request.if_modified_since.timestamp()
+    ):
+        response.status_code = 304
+        return response
+
+    if UPLOAD_SERVE_MODE == "accel":
+        # nginx serves the body (sendfile, Range) from its internal location.
+        response.headers["X-Accel-Redirect"] = UPLOAD_ACCEL_PREFIX + url_quote(meta.name)
+        return response
+
+    try:
+        body = open(meta.path, "rb")
+    except OSError:
+        # Deleted after it was indexed (cleanup, ``migrate_legacy --delete``).
+        upload_store.index.discard(meta.name)
+        return jsonify({"error": "Not found"}), 404
+    response.response = wrap_file(request.environ, body)
+    response.direct_passthrough = True
+    response.content_length = meta.size
+    return response.make_conditional(request, accept_ranges=True, complete_length=meta.size)
 
 
 # --- ADMIN ROUTES ---
 
+ADMIN_LIST_COLUMNS = (
+    "id", "surname", "email", "show_email", "phone", "show_phone",
+    "business_name", "category", "discount", "description", "website",
+    "logo_url", "background_url", "tags", "status", "created_at", "updated_at",
+)
+# Moderation queue: each status is read in turn, so every phase is one
+# range scan of idx_businesses_status_created.  Rows with any other status
+# (NULL, legacy values) come last, in the QUEUE_OTHER phase.
+STATUS_QUEUE_ORDER = ("pending", "approved", "rejected")
+QUEUE_OTHER = "*"
+ADMIN_PAGE_MAX = int(os.getenv("ADMIN_PAGE_MAX", "200"))
+ADMIN_STREAM_MAX = int(os.getenv("ADMIN_STREAM_MAX", "5000"))
+
+
+def admin_phase_rows(cur, columns, where, params, status, keyset, limit):
+    """One ``ORDER BY created_at DESC, id DESC`` read; ``status`` narrows it to a queue phase."""
+    where = list(where)
+    params = list(params)
+    if status == QUEUE_OTHER:
+        where.append(f"(status IS NULL OR status NOT IN ({', '.join(['%s'] * len(STATUS_QUEUE_ORDER))}))")
+        params.extend(STATUS_QUEUE_ORDER)
+    elif status is not None:
+        where.append("status = %s")
+        params.append(status)
+    if keyset is not None:
+        where.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        params.extend([keyset[0], keyset[0], keyset[1]])
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    cur.execute(
+        f"""
+        SELECT {', '.join(columns)}
+        FROM businesses
+        {where_sql}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+        """,
+        (*params, limit),
+    )
+    return cur
+
+
 @app.route("/admin/businesses", methods=["GET"])
 def admin_list_businesses():
-    """Returns all businesses with full details (no privacy filtering)."""
+    """Moderation list with keyset pagination: pending first (``?order=recent`` for plain recency).
+
+    ``?fields=`` limits the columns, ``?status=`` filters, and ``?stream=1``
+    reads through an unbuffered cursor and encodes the JSON row by row.
+    """
+    stream = request.args.get("stream", "").lower() in {"1", "true", "yes"}
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), ADMIN_STREAM_MAX if stream else ADMIN_PAGE_MAX))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    order = request.args.get("order", "queue")
+    if order not in {"queue", "recent"}:
+        return jsonify({"error": "order must be queue or recent"}), 400
+
+    requested = [f for f in split_arg_values("fields") if f in ADMIN_LIST_COLUMNS]
+    columns = ADMIN_LIST_COLUMNS
+    if requested:
+        # The keyset columns are always needed to build the next cursor.
+        columns = tuple(c for c in ADMIN_LIST_COLUMNS if c in requested or c in {"id", "status", "created_at"})
+
     if SKIP_DB_WRITE:
-        return jsonify(mock_businesses()), 200
+        data = [{c: row.get(c) for c in columns} for row in mock_businesses()]
+        return jsonify({"items": data, "next_cursor": None}), 200
+
+    statuses = [s for s in split_arg_values("status") if s in ALLOWED_STATUSES]
+    where, params = business_filters(include_status=False)
+    keyset = None
+    cursor_status = None
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            cursor_created, cursor_id, cursor_status = decode_cursor(cursor)
+        except Exception:
+            return jsonify({"error": "Invalid cursor"}), 400
+        keyset = (cursor_created, cursor_id)
+
+    if order == "queue":
+        phases = [s for s in STATUS_QUEUE_ORDER if not statuses or s in statuses]
+        if not statuses:
+            phases.append(QUEUE_OTHER)
+        if cursor_status is not None:
+            if cursor_status not in phases:
+                return jsonify({"error": "Invalid cursor"}), 400
+            phases = phases[phases.index(cursor_status):]
+    else:
+        phases = [None]
+        if statuses:
+            where.append(f"status IN ({', '.join(['%s'] * len(statuses))})")
+            params.extend(statuses)
+
+    def next_cursor_for(row):
+        if order != "queue":
+            return encode_cursor(row["created_at"], row["id"], None)
+        phase = row["status"] if row["status"] in STATUS_QUEUE_ORDER else QUEUE_OTHER
+        return encode_cursor(row["created_at"], row["id"], phase)
+
+    if not stream:
+        data = []
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                for i, status in enumerate(phases):
+                    wanted = limit + 1 - len(data)
+                    if wanted <= 0:
+                        break
+                    admin_phase_rows(cur, columns, where, params, status, keyset if i == 0 else None, wanted)
+                    data.extend(cur.fetchall())
+        next_cursor = None
+        if len(data) > limit:
+            data = data[:limit]
+            next_cursor = next_cursor_for(data[-1])
+        return jsonify({"items": [parse_tags(row) for row in data], "next_cursor": next_cursor}), 200
+
+    def generate():
+        sent = 0
+        last = None
+        more = False
+        yield '{"items":['
+        with get_conn() as conn:
+            with conn.cursor(SSDictCursor) as cur:
+                for i, status in enumerate(phases):
+                    if sent > limit:
+                        break
+                    admin_phase_rows(cur, columns, where, params, status, keyset if i == 0 else None,
+                                     limit + 1 - sent)
+                    for row in cur:
+                        if sent == limit:
+                            # Row limit + 1 only tells us another page exists.
+                            more = True
+                            sent += 1
+                            continue
+                        yield ("," if sent else "") + app.json.dumps(parse_tags(row))
+                        sent += 1
+                        last = row
+        next_cursor = next_cursor_for(last) if more and last is not None else None
+        yield '],"next_cursor":' + json.dumps(next_cursor) + "}"
+
+    response = Response(generate(), mimetype="application/json")
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@app.route("/admin/businesses/bulk", methods=["POST"])
+def admin_bulk_import():
+    """Imports many listings from a JSON Lines or CSV body (``?format=``, or by Content-Type).
+
+    ``?dry_run=1`` only validates; ``?atomic=1`` inserts nothing if any row is invalid.
+    """
+    try:
+        fmt = detect_format(request.content_type, request.args.get("format"))
+    except BulkFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    dry_run = request.args.get("dry_run", "").lower() in {"1", "true", "yes"} or SKIP_DB_WRITE
+    atomic = request.args.get("atomic", "").lower() in {"1", "true", "yes"}
 
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT * FROM businesses
-                ORDER BY created_at DESC
-                """
-            )
-            data = cur.fetchall()
+    records = iter_records(request.stream, fmt)
+    try:
+        summary = import_records(
+            records, lambda records: clean_business_rows(records, allow_status=True), dry_run=dry_run, atomic=atomic
+        )
+    except Exception as e:
+        print(f"Bulk Import Error: {e}")
+        return jsonify({"error": "Bulk import failed; no rows were inserted"}), 500
+
+    if summary["inserted"] and not summary.get("dry_run"):
+        invalidation.publish("businesses")
+    status = 400 if summary.get("rolled_back") else 200
+    return jsonify(summary), status
 
-    # Parse tags
-    for row in data:
-        tags_val = row.get("tags")
-        if isinstance(tags_val, str):
-            try:
-                row["tags"] = json.loads(tags_val)
-            except Exception:
-                row["tags"] = []
-        elif tags_val is None:
-            row["tags"] = []
 
-    return jsonify(data), 200
+@app.route("/admin/businesses/export", methods=["GET"])
+def admin_export_businesses():
+    """Streams every listing as JSON Lines (default) or CSV (``?format=csv``)."""
+    try:
+        fmt = detect_format(None, request.args.get("format") or "jsonl")
+    except BulkFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    statuses = [s for s in split_arg_values("status") if s in ALLOWED_STATUSES]
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    response = Response(export_rows(fmt, statuses), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=businesses.{fmt}"
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 @app.route("/admin/businesses/<business_id>", methods=["PUT"])
@@ -521,38 +1099,13 @@ def admin_update_business(business_id):
     """Updates a business listing."""
     data = request.get_json(silent=True) or {}
     
-    # Fields allowed to be updated
-    updatable_fields = [
-        "surname", "email", "show_email", "phone", "show_phone",
-        "business_name", "category", "discount", "description", 
-        "website", "status", "logo_url", "background_url"
-    ]
-    
-    # Build update query dynamically
-    updates = []
-    values = []
-    
-    for field in updatable_fields:
-        if field in data:
-            updates.append(f"{field} = %s")
-            val = data[field]
-            # specific cleaning/validations could go here
-            if field == "email":
-                val = strip_html(val).replace(" ", "").lower()
-            elif field in ["surname", "business_name", "category", "description"]:
-                val = sanitize_text(val, 500 if field == "description" else 160)
-            elif field == "website":
-                val = strip_html(val).strip()
-            
-            values.append(val)
-
-    # Handle tags separately if present
-    if "tags" in data:
-        tags = data["tags"]
-        if isinstance(tags, list):
-            cleaned_tags = [sanitize_text(str(tag), 40) for tag in tags if sanitize_text(str(tag), 40)]
-            updates.append("tags = %s")
-            values.append(json.dumps(cleaned_tags))
+    # Same rules as a new listing, applied only to the fields that were sent.
+    values, errors = BUSINESS_SCHEMA.clean(data, partial=True)
+    if errors:
+        return jsonify({"error": error_message(errors), "errors": errors}), 400
+
+    updates = [f"{field} = %s" for field in values]
+    values = list(values.values())
 
     if not updates:
         return jsonify({"message": "No fields to update"}), 200
@@ -569,6 +1122,7 @@ def admin_update_business(business_id):
                 cur.execute(sql, tuple(values))
                 if cur.rowcount == 0:
                     return jsonify({"error": "Business not found"}), 404
+        invalidation.publish("businesses")
         return jsonify({"message": "Business updated successfully"}), 200
     except Exception as e:
         print(f"Update Error: {e}")
@@ -587,6 +1141,7 @@ def admin_delete_business(business_id):
                 cur.execute("DELETE FROM businesses WHERE id = %s", (business_id,))
                 if cur.rowcount == 0:
                     return jsonify({"error": "Business not found"}), 404
+        invalidation.publish("businesses", deleted_id=business_id)
         return jsonify({"message": "Business deleted successfully"}), 200
     except Exception as e:
         print(f"Delete Error: {e}")
@@ -0,0 +1,583 @@
+"""
+Offline load test and benchmark suite for the API.
+
+Drives the real ``app`` object (Flask test client and Flask-SocketIO test
+client) with no network and no MariaDB:
+
+* the database is a SQLite file behind the same ``get_conn()`` interface
+  (``LocalDB``), seeded with synthetic businesses;
+* OpenAI is ``fake_openai.FakeOpenAI`` with a configurable per-token and
+  first-token delay;
+* uploads go to a temporary directory.
+
+Each scenario reports p50/p95/p99 latency, requests per second, errors and
+process memory; ``--tracemalloc`` adds the Python heap peak (slower).  A
+``recommendation.Recommender`` micro-benchmark runs at several synthetic
+directory sizes.  Results are written as JSON; ``--compare old.json``
+prints the change against an earlier run::
+
+    python bench.py --output bench-results.json
+    python bench.py --quick --compare bench-results.json
+
+Rate limiters are lifted for the run so they do not turn load into 429s.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+CATEGORIES = (
+    "Health & Wellness", "Technology & IT", "Education & Tutoring", "Food & Beverage",
+    "Professional Services", "Retail & Shopping", "Automotive", "Real Estate",
+)
+WORDS = (
+    "cafe panaderia pasteles desayunos comida vegana masajes spa yoga dentista clinica abogado "
+    "contabilidad impuestos taller mecanico llantas reparacion celulares laptops diseño web "
+    "fotografia bodas ropa zapatos regalos clases ingles matematicas tutorias inmobiliaria "
+    "departamentos seguros creditos pintura arte musica eventos limpieza jardineria mascotas "
+    "veterinaria gimnasio nutricion farmacia optica papeleria imprenta envios"
+).split()
+QUERIES = (
+    "busco un cafe con desayunos", "clases de ingles para niños", "taller mecanico barato",
+    "masajes relajantes", "abogado para contratos", "reparacion de celulares", "diseño web",
+    "veterinaria para mascotas", "seguros de auto", "fotografia de bodas",
+)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS businesses (
+    id TEXT PRIMARY KEY,
+    surname TEXT, email TEXT, show_email INTEGER DEFAULT 0, phone TEXT, show_phone INTEGER DEFAULT 0,
+    business_name TEXT, category TEXT, discount TEXT, description TEXT, website TEXT,
+    logo_url TEXT, background_url TEXT, tags TEXT, status TEXT DEFAULT 'pending',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP, updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_businesses_created ON businesses (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_businesses_status_created ON businesses (status, created_at, id);
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, title TEXT, thumbnail_url TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# MariaDB and SQLite agree on everything the benchmarked routes use except these.
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(bool, int)
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+
+    @staticmethod
+    def _sql(sql):
+        return sql.replace("%s", "?").replace("NOW()", "CURRENT_TIMESTAMP")
+
+    def execute(self, sql, params=()):
+        self._cur.execute(self._sql(sql), tuple(params))
+        return self._cur.rowcount
+
+    def executemany(self, sql, rows):
+        self._cur.executemany(self._sql(sql), rows)
+        return self._cur.rowcount
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cur.fetchall()]
+
+    def __iter__(self):
+        return (dict(row) for row in self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+
+class _Connection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, cursorclass=None):
+        return _Cursor(self._conn)
+
+    def begin(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        if self._conn.in_transaction:
+            self._conn.commit()
+
+    def rollback(self):
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+
+class LocalDB:
+    """SQLite file standing in for MariaDB behind ``get_conn()`` (one connection per thread)."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        with self.get_conn() as conn:
+            conn._conn.executescript(SQLITE_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def get_conn(self):
+        yield _Connection(self._connection())
+
+    def seed(self, count, rng):
+        now = datetime.utcnow().replace(microsecond=0)
+        rows = []
+        for i in range(count):
+            created = (now - timedelta(minutes=i)).isoformat(" ")
+            rows.append((
+                f"seed-{i:07d}", f"Owner {i}", f"owner{i}@example.com", i % 2, "+52 55 1234 5678", i % 3 == 0,
+                f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}", rng.choice(CATEGORIES), "10%",
+                " ".join(rng.choices(WORDS, k=25)), "https://example.com", None, None,
+                json.dumps(rng.sample(WORDS, 3)), rng.choice(("approved", "approved", "pending")),
+                created, created,
+            ))
+        with self.get_conn() as conn:
+            conn.begin()
+            with conn.cursor() as cur:
+                cur.executemany(
+                    "INSERT INTO businesses (id, surname, email, show_email, phone, show_phone, business_name, "
+                    "category, discount, description, website, logo_url, background_url, tags, status, "
+                    "created_at, updated_at) VALUES (" + ", ".join(["%s"] * 17) + ")",
+                    rows,
+                )
+            conn.commit()
+
+
+# -- measurement ---------------------------------------------------------------
+
+def percentile(sorted_samples, p):
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, max(0, int(round(p * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+
+def summarise(samples, wall, errors, extra=None):
+    ordered = sorted(samples)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None  # noqa: E731
+    result = {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / wall, 1) if wall else None,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p95_ms": ms(percentile(ordered, 0.95)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+        "wall_s": round(wall, 3),
+    }
+    result.update(extra or {})
+    return result
+
+
+def rss_mb():
+    """Resident set size of this process (Linux ``/proc``; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return round(int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+@contextmanager
+def memory_probe(result, trace):
+    before = rss_mb()
+    if trace:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["py_peak_mb"] = round(peak / 2**20, 2)
+        after = rss_mb()
+        result["rss_mb"] = after
+        result["rss_delta_mb"] = round(after - before, 1)
+
+
+def run_load(fn, requests, concurrency, make_client):
+    """Call ``fn(client, i)`` ``requests`` times from ``concurrency`` threads.
+
+    ``fn`` returns ``True`` on success.  Returns ``(latencies, wall, errors)``.
+    """
+    local = threading.local()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = make_client()
+        started = time.perf_counter()
+        try:
+            ok = fn(client, i)
+        except Exception as e:
+            print(f"Bench Error: {e}")
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return latencies, time.perf_counter() - started, errors[0]
+
+
+# -- API scenarios ---------------------------------------------------------------
+
+def noise_png(rng, size=320):
+    from PIL import Image
+
+    image = Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3))
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+
+def business_payload(i, rng):
+    return {
+        "surname": f"Bench {i}",
+        "email": f"bench{i}@example.com",
+        "phone": "+52 55 0000 0000",
+        "business_name": f"{rng.choice(WORDS).title()} bench {i}",
+        "category": rng.choice(CATEGORIES),
+        "discount": "15%",
+        "description": " ".join(rng.choices(WORDS, k=30)),
+        "tags": rng.sample(WORDS, 3),
+    }
+
+
+def api_scenarios(app_module, args, rng):
+    flask_app = app_module.app
+    results = {}
+    n = args.requests
+    c = args.concurrency
+
+    def scenario(name, fn, requests=n, concurrency=c, setup=None, extra=None):
+        if setup:
+            setup()
+        make_client = flask_app.test_client
+        run_load(fn, min(requests, 10), 1, make_client)  # warm-up, not measured
+        result = {"concurrency": concurrency}
+        with memory_probe(result, args.tracemalloc):
+            latencies, wall, errors = run_load(fn, requests, concurrency, make_client)
+        result = summarise(latencies, wall, errors, dict(result, **(extra() if extra else {})))
+        results[name] = result
+        print(f"{name:<28} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+              f"p99 {result['p99_ms']:>8} ms  {result['rps']:>8} req/s  errors {errors}")
+
+    cache = app_module.response_cache
+
+    def list_page(client, i):
+        return client.get(f"/businesses?limit=24&category={CATEGORIES[i % len(CATEGORIES)]}").status_code == 200
+
+    def list_page_uncached(client, i):
+        # Drop the entries before every request so each one runs the view and the query.
+        cache.invalidate("businesses")
+        return list_page(client, i)
+
+    scenario("get_businesses_cached", list_page)
+    scenario("get_businesses_uncached", list_page_uncached)
+
+    def search(client, i):
+        return client.get(f"/businesses/search?q={QUERIES[i % len(QUERIES)].split()[-1][:4]}").status_code == 200
+
+    scenario("search_businesses", search)
+
+    def create(client, i):
+        return client.post("/businesses", json=business_payload(i, random.Random(i))).status_code == 201
+
+    scenario("post_businesses", create, requests=max(1, n // 2))
+
+    images = [noise_png(rng) for _ in range(min(32, args.uploads))]
+
+    def upload(client, i):
+        # The first round stores new files; later rounds hit the content-hash dedupe path.
+        data = {"logo": (io.BytesIO(images[i % len(images)]), f"logo{i}.png")}
+        return client.post("/upload-logo", data=data, content_type="multipart/form-data").status_code == 201
+
+    scenario("upload_logo", upload, requests=args.uploads, concurrency=min(c, 4))
+
+    stored = sorted(app_module.upload_store.index._files)
+    masters = [name for name in stored if "_w" not in name] or stored
+    etags = {}
+
+    def serve(client, i):
+        return client.get(f"/uploads/{masters[i % len(masters)]}").status_code == 200
+
+    def serve_rendition(client, i):
+        return client.get(f"/uploads/{masters[i % len(masters)]}?w=200").status_code == 200
+
+    def serve_not_modified(client, i):
+        name = masters[i % len(masters)]
+        if name not in etags:
+            etags[name] = app_module.upload_store.index.get(name).etag
+        res = client.get(f"/uploads/{name}", headers={"If-None-Match": f'"{etags[name]}"'})
+        return res.status_code == 304
+
+    if masters:
+        scenario("get_upload", serve)
+        scenario("get_upload_w200", serve_rendition)
+        scenario("get_upload_304", serve_not_modified)
+    return results
+
+
+def chat_scenario(app_module, args):
+    """``args.chat_sessions`` Socket.IO clients each sending ``args.chat_messages`` messages at once."""
+    from metrics import LatencyTracker
+
+    app_module.chat_ttft = LatencyTracker(window=100000)
+    app_module.chat_duration = LatencyTracker(window=100000)
+    clients = [app_module.socketio.test_client(app_module.app) for _ in range(args.chat_sessions)]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def session(client):
+        for i in range(args.chat_messages):
+            started = time.perf_counter()
+            client.emit("chat_message", {"message": QUERIES[i % len(QUERIES)]})
+            received = client.get_received()
+            elapsed = time.perf_counter() - started
+            done = [r for r in received if r["name"] == "chat_response_done"]
+            with lock:
+                latencies.append(elapsed)
+                if not done or done[-1]["args"][0].get("error"):
+                    errors[0] += 1
+
+    result = {"sessions": args.chat_sessions, "messages_per_session": args.chat_messages}
+    with memory_probe(result, args.tracemalloc):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.chat_sessions) as pool:
+            list(pool.map(session, clients))
+        wall = time.perf_counter() - started
+    for client in clients:
+        client.disconnect()
+    ttft = app_module.chat_ttft.stats()
+    result = summarise(latencies, wall, errors[0], dict(result, ttft_p50_ms=ttft.get("p50_ms"),
+                                                         ttft_p95_ms=ttft.get("p95_ms")))
+    print(f"{'chat_message':<28} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+          f"p99 {result['p99_ms']:>8} ms  {result['rps']:>8} msg/s  errors {result['errors']}")
+    return result
+
+
+# -- Recommender micro-benchmark ------------------------------------------------
+
+def synthetic_businesses(count, rng):
+    from recommendation import Business
+
+    return [
+        Business(
+            id=f"b{i}",
+            name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+            category=rng.choice(CATEGORIES),
+            discount="10%",
+            city="",
+            description=" ".join(rng.choices(WORDS, k=25)),
+            tags=rng.sample(WORDS, 3),
+        )
+        for i in range(count)
+    ]
+
+
+def recommender_bench(sizes, queries, rng, trace):
+    from recommendation import Recommender
+
+    results = {}
+    for size in sizes:
+        businesses = synthetic_businesses(size, rng)
+        result = {}
+        with memory_probe(result, trace):
+            started = time.perf_counter()
+            rec = Recommender(businesses)
+            fit = time.perf_counter() - started
+        texts = [QUERIES[i % len(QUERIES)] for i in range(queries)]
+        latencies = []
+        for text in texts:
+            started = time.perf_counter()
+            rec.query(text, top_k=8)
+            latencies.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        rec.query_batch(texts, top_k=8)
+        batch = time.perf_counter() - started
+        extra = synthetic_businesses(100, random.Random(size))
+        started = time.perf_counter()
+        for biz in extra:
+            biz.id = f"new-{biz.id}"
+            rec.add(biz)
+        add = (time.perf_counter() - started) / len(extra)
+        summary = summarise(latencies, sum(latencies), 0, result)
+        summary.update({
+            "fit_s": round(fit, 3),
+            "query_batch_qps": round(queries / batch, 1) if batch else None,
+            "add_ms": round(add * 1000, 3),
+        })
+        del summary["wall_s"], summary["errors"]
+        results[str(size)] = summary
+        print(f"recommender {size:>7}: fit {summary['fit_s']} s, query p50 {summary['p50_ms']} ms "
+              f"p95 {summary['p95_ms']} ms, batch {summary['query_batch_qps']} q/s, "
+              f"add {summary['add_ms']} ms, rss {summary['rss_mb']} MB")
+    return results
+
+
+# -- report ----------------------------------------------------------------------
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current, baseline):
+    """Print p95 and throughput changes against ``baseline`` (a previous results dict)."""
+    print("\nvs baseline " + str(baseline.get("meta", {}).get("revision")))
+    for section in ("scenarios", "recommender"):
+        for name, now in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if not before:
+                continue
+            parts = []
+            for key in ("p95_ms", "rps", "query_batch_qps", "fit_s"):
+                if now.get(key) is None or not before.get(key):
+                    continue
+                change = (now[key] - before[key]) / before[key] * 100
+                parts.append(f"{key} {before[key]} -> {now[key]} ({change:+.1f}%)")
+            if parts:
+                print(f"  {section}/{name}: " + ", ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Welfare API.")
+    parser.add_argument("--output", default="bench-results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results JSON to diff against")
+    parser.add_argument("--quick", action="store_true", help="Small run for a smoke check")
+    parser.add_argument("--businesses", type=int, default=5000, help="Seeded rows in the local DB")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per HTTP scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--uploads", type=int, default=200)
+    parser.add_argument("--chat-sessions", type=int, default=8)
+    parser.add_argument("--chat-messages", type=int, default=10, help="Messages per chat session")
+    parser.add_argument("--openai-delay", type=float, default=0.005, help="Fake OpenAI seconds per token")
+    parser.add_argument("--openai-ttft", type=float, default=0.2, help="Fake OpenAI seconds to first token")
+    parser.add_argument("--rec-sizes", default="1000,10000,100000", help="Recommender sizes (comma separated)")
+    parser.add_argument("--rec-queries", type=int, default=200)
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--skip-recommender", action="store_true")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the Python heap peak")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+    if args.quick:
+        args.businesses, args.requests, args.uploads = 500, 200, 40
+        args.chat_sessions, args.chat_messages, args.rec_sizes = 4, 3, "1000,10000"
+        args.openai_ttft, args.openai_delay = 0.05, 0.001
+
+    rng = random.Random(args.seed)
+    workdir = Path(tempfile.mkdtemp(prefix="welfare-bench-"))
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "scenarios": {},
+        "recommender": {},
+    }
+    try:
+        if not args.skip_api:
+            # Configure the app before importing it: no MariaDB, no OpenAI, files in the temp dir.
+            os.environ["SKIP_DB_WRITE"] = "0"
+            os.environ["CHAT_PROVIDER"] = "stub"
+            os.environ["COVER_IMAGE_PROVIDER"] = "stub"
+            os.environ["AI_CACHE_PATH"] = str(workdir / "ai_cache.sqlite3")
+            db = LocalDB(workdir / "bench.sqlite3")
+            db.seed(args.businesses, rng)
+
+            import app as app_module
+            import bulk
+            import knowledge_base
+            from fake_openai import FakeOpenAI
+            from upload_store import UploadStore
+            from upstream import RateLimiter
+
+            for module in (app_module, bulk, knowledge_base):
+                module.get_conn = db.get_conn
+            app_module.UPLOAD_DIR = workdir / "uploads"
+            app_module.UPLOAD_DIR.mkdir()
+            app_module.upload_store = UploadStore(app_module.UPLOAD_DIR)
+            app_module.chat_client = FakeOpenAI(delay=args.openai_delay, first_token_delay=args.openai_ttft)
+            app_module.chat_session_limiter = RateLimiter(per_minute=10**9, burst=10**9)
+            app_module.ai_ip_limiter = RateLimiter(per_minute=10**9, burst=10**9)
+
+            report["scenarios"] = api_scenarios(app_module, args, rng)
+            report["scenarios"]["chat_message"] = chat_scenario(app_module, args)
+        if not args.skip_recommender:
+            sizes = [int(s) for s in args.rec_sizes.split(",") if s.strip()]
+            report["recommender"] = recommender_bench(sizes, args.rec_queries, rng, args.tracemalloc)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            compare(report, json.load(fh))
+
+
+if __name__ == "__main__":
+    main()
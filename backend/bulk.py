@@ -0,0 +1,224 @@
+"""
+Bulk import/export of ``businesses`` for the admin API.
+
+Imports read the request body as a stream (JSON Lines or CSV), validate
+every row with the same schema as ``POST /businesses`` (``validation.py``,
+in batch mode) and insert the valid
+ones with ``executemany`` in batches of ``BULK_BATCH_SIZE`` inside one
+transaction.  Exports walk a server-side cursor (``SSDictCursor``) and
+yield the rows as they arrive instead of ``fetchall()``-ing the table.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+
+from db import SSDictCursor, get_conn
+
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "10000"))
+BULK_MAX_ERRORS = int(os.getenv("BULK_MAX_ERRORS", "1000"))
+EXPORT_FLUSH_ROWS = 200
+
+INSERT_COLUMNS = (
+    "id", "surname", "email", "show_email", "phone", "show_phone",
+    "business_name", "category", "discount", "description", "website",
+    "logo_url", "background_url", "tags", "status",
+)
+INSERT_SQL = (
+    f"INSERT INTO businesses ({', '.join(INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join(['%s'] * len(INSERT_COLUMNS))})"
+)
+EXPORT_COLUMNS = (
+    "id", "surname", "email", "show_email", "phone", "show_phone",
+    "business_name", "category", "discount", "description", "website",
+    "logo_url", "background_url", "tags", "status", "created_at", "updated_at",
+)
+
+_TRUE = {"1", "true", "yes", "si", "sí", "y"}
+
+
+class BulkFormatError(ValueError):
+    """The body as a whole cannot be parsed (unknown format, bad CSV header)."""
+
+
+def detect_format(content_type: str, requested: str = None) -> str:
+    fmt = (requested or "").lower()
+    if not fmt:
+        content_type = (content_type or "").lower()
+        fmt = "csv" if "csv" in content_type else "jsonl"
+    if fmt in {"ndjson", "json"}:
+        fmt = "jsonl"
+    if fmt not in {"jsonl", "csv"}:
+        raise BulkFormatError("format must be jsonl or csv")
+    return fmt
+
+
+def _text_lines(stream):
+    """Decode a binary stream line by line without reading it all."""
+    return codecs.getreader("utf-8-sig")(stream, errors="replace")
+
+
+def _csv_row(row):
+    data = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    for flag in ("show_email", "show_phone"):
+        if flag in data:
+            data[flag] = str(data[flag]).lower() in _TRUE
+    tags = data.get("tags")
+    if isinstance(tags, str):
+        try:
+            parsed = json.loads(tags)
+        except ValueError:
+            parsed = [t for t in tags.replace(";", ",").split(",") if t.strip()]
+        data["tags"] = parsed if isinstance(parsed, list) else []
+    elif tags is None:
+        data.pop("tags", None)
+    return data
+
+
+def iter_records(stream, fmt):
+    """Yield ``(line_number, dict_or_error_message)`` for each row of the body."""
+    if fmt == "csv":
+        reader = csv.DictReader(_text_lines(stream))
+        if not reader.fieldnames:
+            return
+        for row in reader:
+            if None in row:
+                yield reader.line_num, "Too many columns"
+                continue
+            yield reader.line_num, _csv_row(row)
+        return
+
+    for line_no, line in enumerate(_text_lines(stream), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield line_no, "Each line must be a JSON object"
+            continue
+        yield line_no, data
+
+
+def import_records(records, clean_rows, batch_size=BULK_BATCH_SIZE, max_rows=BULK_MAX_ROWS,
+                   dry_run=False, atomic=False):
+    """Validate ``records`` with ``clean_rows`` and insert the valid rows.
+
+    ``clean_rows(records)`` yields ``(line, row_tuple, None)`` or
+    ``(line, None, error)`` for each ``(line, data)`` record.
+    With ``atomic`` any invalid row rolls the whole import back.  Returns
+    the summary dict sent to the client.
+    """
+    summary = {"received": 0, "inserted": 0, "invalid": 0, "errors": [], "ids": []}
+
+    def note_error(line, error):
+        summary["invalid"] += 1
+        if len(summary["errors"]) < BULK_MAX_ERRORS:
+            summary["errors"].append({"line": line, "error": error})
+
+    def run(cur):
+        batch = []
+        for line, row, error in clean_rows(records):
+            summary["received"] += 1
+            if summary["received"] > max_rows:
+                summary["received"] -= 1
+                summary["truncated"] = True
+                break
+            if error:
+                note_error(line, error)
+                continue
+            batch.append(row)
+            summary["ids"].append(row[0])
+            if len(batch) >= batch_size:
+                if cur is not None:
+                    cur.executemany(INSERT_SQL, batch)
+                summary["inserted"] += len(batch)
+                batch = []
+        if batch:
+            if cur is not None:
+                cur.executemany(INSERT_SQL, batch)
+            summary["inserted"] += len(batch)
+
+    if dry_run:
+        run(None)
+        summary["dry_run"] = True
+        return summary
+
+    with get_conn() as conn:
+        conn.begin()
+        try:
+            with conn.cursor() as cur:
+                run(cur)
+            if atomic and summary["invalid"]:
+                conn.rollback()
+                summary["inserted"] = 0
+                summary["ids"] = []
+                summary["rolled_back"] = True
+            else:
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return summary
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _export_row(row):
+    out = {c: _plain(row.get(c)) for c in EXPORT_COLUMNS}
+    if isinstance(out["tags"], str):
+        try:
+            out["tags"] = json.loads(out["tags"])
+        except ValueError:
+            out["tags"] = []
+    out["tags"] = out["tags"] or []
+    return out
+
+
+def export_rows(fmt, statuses=()):
+    """Generator of export chunks; holds one pooled connection while it runs."""
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM businesses"
+    params = ()
+    if statuses:
+        sql += f" WHERE status IN ({', '.join(['%s'] * len(statuses))})"
+        params = tuple(statuses)
+    sql += " ORDER BY created_at, id"
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(EXPORT_COLUMNS)
+
+    with get_conn() as conn:
+        # Unbuffered: rows are read off the socket as we go, not loaded up front.
+        with conn.cursor(SSDictCursor) as cur:
+            cur.execute(sql, params)
+            pending = 0
+            for row in cur:
+                row = _export_row(row)
+                if writer is not None:
+                    row["tags"] = json.dumps(row["tags"], ensure_ascii=False)
+                    writer.writerow([row[c] for c in EXPORT_COLUMNS])
+                else:
+                    buffer.write(json.dumps(row, ensure_ascii=False))
+                    buffer.write("\n")
+                pending += 1
+                if pending >= EXPORT_FLUSH_ROWS:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,66 @@
+"""
+Image providers for AI cover generation.
+
+``OpenAIImageProvider`` wraps ``client.images.generate``; ``StubImageProvider``
+returns a small deterministic PNG (one colour derived from the prompt) so the
+cover job pipeline can run offline, e.g. with ``COVER_IMAGE_PROVIDER=stub``.
+"""
+
+import base64
+import hashlib
+import struct
+import time
+import zlib
+
+
+class OpenAIImageProvider:
+    def __init__(self, client, model, size):
+        self.client = client
+        self.model = model
+        self.size = size
+
+    def generate(self, prompt: str) -> bytes:
+        result = self.client.images.generate(
+            model=self.model,
+            prompt=prompt,
+            size=self.size,
+            response_format="b64_json",
+        )
+        return base64.b64decode(result.data[0].b64_json)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def solid_png(width: int, height: int, rgb) -> bytes:
+    """Encode a single-colour RGB PNG without any imaging library."""
+    row = b"\x00" + bytes(rgb) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + _png_chunk(b"IDAT", zlib.compress(row * height))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+class StubImageProvider:
+    """Offline stand-in: same prompt, same image; ``delay`` simulates upstream latency."""
+
+    model = "stub"
+
+    def __init__(self, size="1792x1024", delay=0.0):
+        width, _, height = size.partition("x")
+        # Keep the stub small; only the aspect ratio of the real size matters.
+        self.width = 320
+        self.height = max(1, round(320 * int(height) / int(width))) if width and height else 180
+        self.size = size
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, prompt: str) -> bytes:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        rgb = hashlib.sha256(prompt.encode("utf-8")).digest()[:3]
+        return solid_png(self.width, self.height, rgb)
@@ -1,21 +1,329 @@
 import os
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
 
 import pymysql
+import pymysql.cursors
 
+from metrics import REGISTRY, add_span
 
-@contextmanager
-def get_conn():
-    conn = pymysql.connect(
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_MAX_AGE = float(os.getenv("DB_POOL_MAX_AGE", "3600"))
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "5"))
+
+
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "db_query_duration_seconds", "Time spent in cursor.execute", ("operation",)
+)
+DB_ROWS = REGISTRY.counter("db_rows_total", "Rows returned or affected by queries", ("operation",))
+DB_ERRORS = REGISTRY.counter("db_query_errors_total", "Queries that raised", ("operation",))
+_OPERATIONS = {"select", "insert", "update", "delete", "replace"}
+
+
+def _operation(query) -> str:
+    head = query.lstrip()[:8].split() if isinstance(query, str) else ()
+    word = head[0].lower() if head else ""
+    return word if word in _OPERATIONS else "other"
+
+
+class _TimedCursor:
+    """Records every ``execute`` (``executemany`` goes through it too) in the query metrics."""
+
+    def execute(self, query, args=None):
+        operation = _operation(query)
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, args)
+        except Exception:
+            DB_ERRORS.inc(operation)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_QUERY_SECONDS.observe(elapsed, operation)
+        rows = self.rowcount
+        # Unbuffered (SS) cursors do not know their row count yet.
+        if rows is not None and 0 <= rows < 1 << 32:
+            DB_ROWS.inc(operation, amount=rows)
+        add_span(f"db.{operation}", elapsed, rows=rows)
+        return result
+
+
+class DictCursor(_TimedCursor, pymysql.cursors.DictCursor):
+    pass
+
+
+class SSDictCursor(_TimedCursor, pymysql.cursors.SSDictCursor):
+    pass
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+def _connect():
+    return pymysql.connect(
         host=os.getenv("DB_HOST", "127.0.0.1"),
         user=os.getenv("DB_USER", "mastercreators"),
         password=os.getenv("DB_PASSWORD", "changeme"),
         database=os.getenv("DB_NAME", "welfare"),
-        cursorclass=pymysql.cursors.DictCursor,
+        cursorclass=DictCursor,
         charset="utf8mb4",
         autocommit=True,
     )
+
+
+class _Pooled:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Bounded pool of PyMySQL connections.
+
+    Waiting uses ``threading.Condition``; under ``gunicorn -k eventlet`` the
+    worker monkey-patches ``threading`` so a waiting request yields to the hub
+    instead of blocking the process.
+    """
+
+    def __init__(self, connect=_connect, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX,
+                 timeout=DB_POOL_TIMEOUT, max_idle=DB_POOL_MAX_IDLE,
+                 max_age=DB_POOL_MAX_AGE, ping_after=DB_POOL_PING_AFTER):
+        self._connect = connect
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.ping_after = ping_after
+
+        self._idle = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._warmed = False
+
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.recycled = 0
+        self.failed_pings = 0
+
+    # -- internals ---------------------------------------------------------
+
+    def _open(self):
+        pooled = _Pooled(self._connect())
+        self.created += 1
+        return pooled
+
+    def _discard(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, pooled, now):
+        if self.max_age and now - pooled.created_at > self.max_age:
+            return True
+        if self.max_idle and now - pooled.last_used > self.max_idle:
+            return True
+        return False
+
+    def _healthy(self, pooled, now):
+        # Pinging every checkout would add a round trip to every query, so
+        # only connections that sat idle for a while are checked.
+        if now - pooled.last_used < self.ping_after:
+            return True
+        try:
+            pooled.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            self.failed_pings += 1
+            return False
+
+    def _warm_up(self):
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                pooled = self._open()
+            except Exception as e:
+                print(f"DB Pool Warm-up Error: {e}")
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                continue
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def _reserve(self):
+        """Take an idle connection or a slot for a new one, waiting if the pool is full.
+
+        Returns ``(pooled, stale)``; ``pooled`` is ``None`` when the caller
+        owns a fresh slot and must open the connection itself.  Network work
+        (connect, ping, close) always happens outside the lock.
+        """
+        waited_since = None
+        deadline = None
+        stale = []
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                pooled = None
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._expired(candidate, now):
+                        self.recycled += 1
+                        self._size -= 1
+                        stale.append(candidate)
+                        continue
+                    pooled = candidate
+                    break
+
+                if pooled is not None or self._size < self.max_size:
+                    if pooled is None:
+                        self._size += 1
+                    if waited_since is not None:
+                        self.wait_time += now - waited_since
+                    self.in_use += 1
+                    self.checkouts += 1
+                    return pooled, stale
+
+                if waited_since is None:
+                    waited_since = now
+                    deadline = now + self.timeout
+                    self.waits += 1
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.wait_time += now - waited_since
+                    self.timeouts += 1
+                    for s in stale:
+                        self._discard(s)
+                    raise PoolTimeout(f"No DB connection available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+    # -- public API --------------------------------------------------------
+
+    def acquire(self):
+        if not self._warmed:
+            self._warm_up()
+        while True:
+            pooled, stale = self._reserve()
+            for s in stale:
+                self._discard(s)
+
+            if pooled is None:
+                try:
+                    return self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self.in_use -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._healthy(pooled, time.monotonic()):
+                return pooled
+            self._discard(pooled)
+            with self._cond:
+                self._size -= 1
+                self.in_use -= 1
+                self._cond.notify()
+
+    def release(self, pooled, discard=False):
+        if not discard:
+            try:
+                if not pooled.conn.get_autocommit():
+                    pooled.conn.rollback()
+                    pooled.conn.autocommit(True)
+            except Exception:
+                discard = True
+        with self._cond:
+            self.in_use -= 1
+            now = time.monotonic()
+            if discard or (self.max_age and now - pooled.created_at > self.max_age):
+                self._size -= 1
+                self._discard(pooled)
+            else:
+                pooled.last_used = now
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._size -= 1
+                self._discard(self._idle.pop())
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self.in_use,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time_ms": round(self.wait_time * 1000, 3),
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "recycled": self.recycled,
+                "failed_pings": self.failed_pings,
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, recreating it after a fork."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool()
+                _pool_pid = pid
+    return _pool
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+@contextmanager
+def get_conn():
+    pool = get_pool()
+    pooled = pool.acquire()
+    broken = False
     try:
-        yield conn
+        yield pooled.conn
+    except pymysql.err.OperationalError:
+        broken = True
+        raise
+    except pymysql.err.InterfaceError:
+        broken = True
+        raise
     finally:
-        conn.close()
+        pool.release(pooled, discard=broken)
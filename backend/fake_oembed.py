@@ -0,0 +1,95 @@
+"""
+Local stand-in for noembed.com's ``/embed`` endpoint.
+
+Answers ``GET /embed?url=...`` with a deterministic title and thumbnail,
+so video enrichment can be exercised without network access::
+
+    python fake_oembed.py --port 8765 --delay 0.5
+    OEMBED_URL=http://127.0.0.1:8765/embed python app.py
+
+URLs containing ``fail`` get a 503, ``unsupported`` the 200 +
+``{"error": ...}`` noembed sends for unknown providers, and ``slow`` an
+extra ``--slow-delay`` (to trip the client timeout).  ``start()`` runs
+the server on a background thread for scripts.
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        parsed = urlparse(self.path)
+        url = parse_qs(parsed.query).get("url", [""])[0]
+        with server.lock:
+            server.requests += 1
+        if parsed.path != "/embed" or not url:
+            return self._send(404, {"error": "not found"})
+        if server.delay:
+            time.sleep(server.delay)
+        if "slow" in url:
+            time.sleep(server.slow_delay)
+        if "fail" in url:
+            return self._send(503, {"error": "upstream unavailable"})
+        if "unsupported" in url:
+            return self._send(200, {"error": "no matching providers found", "url": url})
+        slug = url.rstrip("/").rsplit("/", 1)[-1].split("=")[-1] or "video"
+        return self._send(200, {
+            "title": f"Video {slug}",
+            "thumbnail_url": f"https://img.example.test/{slug}.jpg",
+            "provider_name": "Fake",
+            "url": url,
+        })
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=0, delay=0.0, slow_delay=10.0):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.slow_delay = slow_delay
+    server.requests = 0
+    server.lock = threading.Lock()
+    return server
+
+
+def start(delay=0.0, slow_delay=10.0):
+    """Serve on a free local port in a daemon thread; returns ``(server, endpoint_url)``."""
+    server = make_server(delay=delay, slow_delay=slow_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/embed"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake oEmbed (noembed) server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds added to every answer")
+    parser.add_argument("--slow-delay", type=float, default=10.0, help="Extra seconds for URLs containing 'slow'")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.delay, args.slow_delay)
+    print(f"Fake oEmbed on http://{args.host}:{args.port}/embed")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+In-process stand-in for the parts of the OpenAI client the chat uses.
+
+``FakeOpenAI().chat.completions.create(..., stream=True)`` yields chunks
+shaped like the SDK's (``chunk.choices[0].delta.content``), one word at a
+time with an optional delay, so streaming can be exercised without network
+access or an API key (``CHAT_PROVIDER=stub``).  The reply lists the first
+businesses found in the system prompt, which makes retrieval visible too.
+"""
+
+import re
+import time
+from types import SimpleNamespace
+
+
+_BUSINESS_LINE = re.compile(r"^\s*- \*\*(.+?)\*\* \((.*?)\)", re.MULTILINE)
+
+
+def fake_reply(messages) -> str:
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    found = _BUSINESS_LINE.findall(system)[:3]
+    if not found:
+        return "No hay negocios registrados en esa categoria aun."
+    lines = "\n".join(f"- **{name}** ({category})" for name, category in found)
+    return f'Para "{question}" te recomiendo:\n{lines}'
+
+
+def _chunk(content=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, role=None)
+    return SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=finish_reason)])
+
+
+def _usage(prompt_tokens, completion_tokens):
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+    )
+
+
+class _Completions:
+    def __init__(self, delay, first_token_delay):
+        self.delay = delay
+        self.first_token_delay = first_token_delay
+        self.calls = 0
+
+    def create(self, model=None, messages=(), stream=False, stream_options=None, **_):
+        self.calls += 1
+        reply = fake_reply(messages)
+        # Words stand in for tokens; close enough for the usage metrics.
+        prompt_tokens = sum(len(m["content"].split()) for m in messages)
+        if not stream:
+            message = SimpleNamespace(role="assistant", content=reply)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+                usage=_usage(prompt_tokens, len(reply.split())),
+            )
+        include_usage = bool((stream_options or {}).get("include_usage"))
+        return self._stream(reply, prompt_tokens if include_usage else None)
+
+    def _stream(self, reply, prompt_tokens=None):
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        tokens = re.findall(r"\S+\s*|\s+", reply)
+        for token in tokens:
+            yield _chunk(token)
+            if self.delay:
+                time.sleep(self.delay)
+        yield _chunk(finish_reason="stop")
+        if prompt_tokens is not None:
+            # Like the API with stream_options={"include_usage": True}: a last chunk with no choices.
+            yield SimpleNamespace(choices=[], usage=_usage(prompt_tokens, len(tokens)))
+
+
+class FakeOpenAI:
+    def __init__(self, delay=0.0, first_token_delay=0.0):
+        self.chat = SimpleNamespace(completions=_Completions(delay, first_token_delay))
@@ -0,0 +1,168 @@
+"""
+Local stand-in for the part of Redis the multi-worker mode uses: pub/sub.
+
+Speaks enough of the Redis protocol (RESP) for redis-py, and therefore for
+the Socket.IO message queue and the invalidation bus, to run on a box
+without ``redis-server``::
+
+    python fake_redis.py --port 6380
+    SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6380/0 python app.py
+
+Only ``PUBLISH``, ``SUBSCRIBE``, ``UNSUBSCRIBE``, ``PING``, ``ECHO`` and
+the connection set-up commands (``CLIENT``, ``SELECT``, ``QUIT``) are
+understood; nothing is stored.  Use a real Redis in production.
+``start()`` runs the server on a background thread for scripts.
+"""
+
+import argparse
+import socketserver
+import threading
+
+
+def _bulk(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, str):
+        value = value.encode()
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _array(*items) -> bytes:
+    out = [b"*%d\r\n" % len(items)]
+    for item in items:
+        out.append(b":%d\r\n" % item if isinstance(item, int) else _bulk(item))
+    return b"".join(out)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.channels = set()
+        self.write_lock = threading.Lock()
+
+    def send(self, data: bytes):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()  # inline command (telnet, redis-cli --no-raw)
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        try:
+            while True:
+                args = self.read_command()
+                if args is None:
+                    return
+                if not args:
+                    continue
+                command = args[0].upper()
+                if command == b"QUIT":
+                    self.send(b"+OK\r\n")
+                    return
+                self.dispatch(server, command, args[1:])
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            server.unsubscribe(self, list(self.channels))
+
+    def dispatch(self, server, command, args):
+        if command == b"PUBLISH" and len(args) == 2:
+            self.send(b":%d\r\n" % server.publish(args[0], args[1]))
+        elif command == b"SUBSCRIBE" and args:
+            for channel in args:
+                server.subscribe(self, channel)
+                self.send(_array(b"subscribe", channel, len(self.channels)))
+        elif command == b"UNSUBSCRIBE":
+            channels = args or sorted(self.channels)
+            if not channels:
+                self.send(_array(b"unsubscribe", None, 0))
+            for channel in channels:
+                server.unsubscribe(self, [channel])
+                self.send(_array(b"unsubscribe", channel, len(self.channels)))
+        elif command == b"PING":
+            if self.channels:
+                self.send(_array(b"pong", args[0] if args else b""))
+            else:
+                self.send(_bulk(args[0]) if args else b"+PONG\r\n")
+        elif command == b"ECHO" and args:
+            self.send(_bulk(args[0]))
+        elif command in (b"CLIENT", b"SELECT"):
+            self.send(b"+OK\r\n")
+        else:
+            self.send(b"-ERR unknown command '%s'\r\n" % command.lower())
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, _Handler)
+        self.lock = threading.Lock()
+        self.subscribers = {}  # channel -> set of handlers
+        self.published = 0
+
+    def subscribe(self, handler, channel):
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(handler)
+            handler.channels.add(channel)
+
+    def unsubscribe(self, handler, channels):
+        with self.lock:
+            for channel in channels:
+                handler.channels.discard(channel)
+                subscribers = self.subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(handler)
+                    if not subscribers:
+                        del self.subscribers[channel]
+
+    def publish(self, channel, message) -> int:
+        with self.lock:
+            self.published += 1
+            receivers = list(self.subscribers.get(channel, ()))
+        frame = _array(b"message", channel, message)
+        delivered = 0
+        for handler in receivers:
+            try:
+                handler.send(frame)
+                delivered += 1
+            except OSError:
+                pass
+        return delivered
+
+
+def start(host="127.0.0.1", port=0):
+    """Serve in a daemon thread; returns ``(server, redis_url)``."""
+    server = FakeRedisServer((host, port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"redis://{host}:{port}/0"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pub/sub-only Redis stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+    server = FakeRedisServer((args.host, args.port))
+    print(f"Fake Redis (pub/sub only) on redis://{args.host}:{args.port}/0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
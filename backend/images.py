@@ -0,0 +1,154 @@
+"""
+Image pipeline for uploaded logos/covers and AI-generated covers.
+
+Everything that lands in ``uploads/`` goes through ``process_image``: the
+real format is checked with Pillow (not the file extension), EXIF
+orientation is applied and all metadata dropped by re-encoding, and the
+result is a master capped at ``IMAGE_MASTER_MAX_SIDE`` plus narrower
+renditions (``IMAGE_RENDITION_WIDTHS``) for cards and thumbnails.
+
+Renditions are stored next to the master as ``<stem>_w<width>.<ext>`` and
+served through ``/uploads/<file>?w=<width>``; ``upload_store`` decides
+where the files live.
+
+Decoding and resizing are CPU work that would stall the single eventlet
+worker, so callers go through ``offload()``: under eventlet it runs the
+function on a native thread (``eventlet.tpool``; Pillow releases the GIL)
+with at most ``IMAGE_WORKERS`` images in memory at once.  JPEGs are decoded
+at reduced scale (``draft``) and large images shrunk with ``reduce`` before
+the LANCZOS pass.
+"""
+
+import io
+import os
+import threading
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "webp").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "82"))
+IMAGE_MASTER_MAX_SIDE = int(os.getenv("IMAGE_MASTER_MAX_SIDE", "1600"))
+IMAGE_RENDITION_WIDTHS = tuple(
+    sorted(int(w) for w in os.getenv("IMAGE_RENDITION_WIDTHS", "200,640").split(",") if w.strip())
+)
+# ~64 MB per decoded RGBA frame; keeps a few concurrent uploads inside a 1 GB box.
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(16_000_000)))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Resize in integer ``reduce`` steps down to twice the target, then LANCZOS.
+REDUCING_GAP = 2.0
+
+ACCEPTED_FORMATS = {"PNG", "JPEG", "WEBP"}
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+class InvalidImage(ValueError):
+    """The upload is not a PNG/JPEG/WebP image we are willing to decode."""
+
+
+def output_extension() -> str:
+    return EXTENSIONS.get(IMAGE_FORMAT, "webp")
+
+
+_slots = threading.BoundedSemaphore(max(1, IMAGE_WORKERS))
+
+
+def offload(fn, *args):
+    """Run ``fn(*args)`` off the eventlet hub (when there is one), ``IMAGE_WORKERS`` at a time."""
+    with _slots:
+        try:
+            from eventlet import patcher, tpool
+        except ImportError:
+            return fn(*args)
+        if not patcher.is_monkey_patched("thread"):
+            return fn(*args)
+        return tpool.execute(fn, *args)
+
+
+def open_image(source, max_side=None) -> Image.Image:
+    """Open and fully decode ``source`` (bytes or file object), checking its real type and size.
+
+    With ``max_side`` a JPEG is decoded at the smallest scale still at least
+    that large, which is much cheaper than a full decode.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        image = Image.open(source)
+        if image.format not in ACCEPTED_FORMATS:
+            raise InvalidImage(f"Unsupported image type: {image.format or 'unknown'}")
+        # Checked before load() so a decompression bomb never gets decoded.
+        if image.width * image.height > IMAGE_MAX_PIXELS:
+            raise InvalidImage("Image dimensions are too large")
+        if max_side and image.format == "JPEG":
+            image.draft(image.mode, (max_side, max_side))
+        image.load()
+    except InvalidImage:
+        raise
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidImage("Not a valid PNG, JPG or WebP image")
+    return image
+
+
+def _normalise_mode(image: Image.Image) -> Image.Image:
+    has_alpha = image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info)
+    if IMAGE_FORMAT == "jpeg":
+        if has_alpha:
+            rgba = image.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, (255, 255, 255))
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            return flat
+        return image.convert("RGB")
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def _fit_width(image: Image.Image, width: int) -> Image.Image:
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+
+def encode(image: Image.Image) -> bytes:
+    # Re-encoding without passing exif/icc/info is what strips the metadata.
+    out = io.BytesIO()
+    if IMAGE_FORMAT == "jpeg":
+        image.save(out, "JPEG", quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(out, "WEBP", quality=IMAGE_QUALITY, method=4)
+    return out.getvalue()
+
+
+def process_image(source):
+    """Return ``(master_bytes, {width: rendition_bytes})`` for an uploaded image."""
+    image = open_image(source, IMAGE_MASTER_MAX_SIDE)
+    image = ImageOps.exif_transpose(image)
+    image = _normalise_mode(image)
+    image.thumbnail((IMAGE_MASTER_MAX_SIDE, IMAGE_MASTER_MAX_SIDE), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    renditions = {}
+    for width in IMAGE_RENDITION_WIDTHS:
+        if width < image.width:
+            renditions[width] = encode(_fit_width(image, width))
+    return encode(image), renditions
+
+
+def rendition_name(filename: str, width: int) -> str:
+    stem = filename.rsplit(".", 1)[0]
+    return f"{stem}_w{width}.{output_extension()}"
+
+
+def pick_width(requested: int):
+    """Smallest rendition at least ``requested`` wide, or ``None`` for the master."""
+    for width in IMAGE_RENDITION_WIDTHS:
+        if width >= requested:
+            return width
+    return None
+
+
+def make_rendition(path, width: int) -> bytes:
+    """Encode one rendition of an existing file (e.g. one stored before this pipeline)."""
+    with open(path, "rb") as fh:
+        image = open_image(fh, width)
+    image = _normalise_mode(ImageOps.exif_transpose(image))
+    return encode(_fit_width(image, width))
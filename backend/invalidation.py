@@ -0,0 +1,134 @@
+"""
+Cross-worker cache invalidation over Redis pub/sub.
+
+Each worker keeps its own caches (``ResponseCache``, ``KnowledgeBase`` and
+the indexes that follow it).  Write routes call ``bus.publish(topic, ...)``
+instead of invalidating directly: the local handlers run at once and the
+event goes out on ``INVALIDATION_CHANNEL``, where every other worker's
+listener thread runs the same handlers.  Without a URL the bus is purely
+local, which is the single-worker behaviour.
+
+Delivery is best effort.  If Redis is unreachable, the other workers catch
+up through their own expiry (``RESPONSE_CACHE_TTL``, ``KB_REFRESH_INTERVAL``).
+After a reconnect the listener runs every handler once, since events may
+have been missed while it was away.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "welfare:invalidate")
+INVALIDATION_RETRY_MAX = float(os.getenv("INVALIDATION_RETRY_MAX", "30"))
+
+
+class InvalidationBus:
+    """``on(topic, handler)`` registers ``handler(**payload)``; ``publish`` runs it everywhere."""
+
+    def __init__(self, url=None, channel=INVALIDATION_CHANNEL, retry_max=INVALIDATION_RETRY_MAX):
+        self.url = url or None
+        self.channel = channel
+        self.retry_max = retry_max
+        self.origin = uuid.uuid4().hex
+        self._handlers = {}
+        self._client = None
+        self._lock = threading.Lock()
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+        self.resyncs = 0
+
+    def on(self, topic, handler):
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def start(self):
+        """Connect and start the listener thread; a no-op without a URL."""
+        if self.url is None or self._client is not None:
+            return
+        import redis  # only needed for multi-worker mode
+
+        self._client = redis.Redis.from_url(self.url, socket_connect_timeout=5)
+        threading.Thread(target=self._listen, name="invalidation", daemon=True).start()
+
+    def publish(self, topic, **payload):
+        self._dispatch(topic, payload)
+        with self._lock:
+            self.published += 1
+        if self._client is None:
+            return
+        message = json.dumps({"origin": self.origin, "topic": topic, "payload": payload}, default=str)
+        try:
+            self._client.publish(self.channel, message)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            print(f"Invalidation Publish Error: {e}")
+
+    def _dispatch(self, topic, payload):
+        for handler in self._handlers.get(topic, ()):
+            try:
+                handler(**payload)
+            except Exception as e:
+                print(f"Invalidation Handler Error ({topic}): {e}")
+
+    def _receive(self, data):
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if message.get("origin") == self.origin:
+            return  # already applied by publish()
+        with self._lock:
+            self.received += 1
+        self._dispatch(message.get("topic"), message.get("payload") or {})
+
+    def _resync(self):
+        with self._lock:
+            self.resyncs += 1
+        for topic in self._handlers:
+            self._dispatch(topic, {})
+
+    def _listen(self):
+        delay = 1.0
+        subscribed_before = False
+        while True:
+            pubsub = None
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.connected = True
+                delay = 1.0
+                if subscribed_before:
+                    self._resync()
+                subscribed_before = True
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._receive(message["data"])
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"Invalidation Listener Error: {e}")
+            finally:
+                self.connected = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, self.retry_max)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.url is not None,
+                "connected": self.connected,
+                "published": self.published,
+                "received": self.received,
+                "errors": self.errors,
+                "resyncs": self.resyncs,
+            }
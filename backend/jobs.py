@@ -0,0 +1,179 @@
+"""
+Small in-process job queue for slow upstream work (AI cover generation).
+
+A request submits a job and gets its id back immediately; a bounded pool
+of workers runs the jobs and the client polls ``GET /ai/jobs/<id>`` (or
+gets a Socket.IO push).  Identical work (same ``key``) is deduplicated
+while a job is queued, running, or recently finished, and every client can
+only have a few jobs in flight at once.
+
+Workers are plain ``threading`` threads.  Under ``gunicorn -k eventlet``
+the worker monkey-patches ``threading`` and ``queue``, so they become green
+threads and a job waiting on OpenAI does not block the hub; with the
+unpatched dev server (``python app.py``) they stay OS threads, which keeps
+the blocking ``queue.get`` off the event loop.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "50"))
+JOB_MAX_PER_CLIENT = int(os.getenv("JOB_MAX_PER_CLIENT", "2"))
+JOB_TTL = float(os.getenv("JOB_TTL", "600"))
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds ``max_queued`` pending jobs."""
+
+
+class ClientLimitExceeded(Exception):
+    """Raised when a client already has ``max_per_client`` jobs in flight."""
+
+
+class Job:
+    def __init__(self, fn, key=None, client=None, meta=None):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.key = key
+        self.client = client
+        self.meta = meta or {}
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.status in {"queued", "running"}
+
+    def to_dict(self):
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "error":
+            data["error"] = self.error
+        return data
+
+
+def _spawn_thread(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, max_queued=JOB_QUEUE_MAX, max_per_client=JOB_MAX_PER_CLIENT,
+                 ttl=JOB_TTL, spawn=None, on_done=None, error_message="Job failed"):
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.max_per_client = max_per_client
+        self.ttl = ttl
+        self.spawn = spawn or _spawn_thread
+        self.on_done = on_done
+        # What clients see for a failed job; the exception itself (upstream
+        # request ids, account details) only goes to the log.
+        self.error_message = error_message
+
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._by_key = {}
+        self._active_by_client = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _start(self):
+        if self._started:
+            return
+        self._started = True
+        for _ in range(self.workers):
+            self.spawn(self._worker)
+
+    def _expire(self, now):
+        for job_id in [j for j, job in self._jobs.items()
+                       if not job.active and now - job.finished_at > self.ttl]:
+            job = self._jobs.pop(job_id)
+            if job.key is not None and self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+    def submit(self, fn, key=None, client=None, meta=None):
+        """Queue ``fn`` and return ``(job, created)``; ``created`` is False for a deduplicated job."""
+        with self._lock:
+            self._expire(time.time())
+            existing = self._by_key.get(key) if key is not None else None
+            if existing is not None and existing.status != "error":
+                self.deduplicated += 1
+                return existing, False
+            if client is not None and self._active_by_client.get(client, 0) >= self.max_per_client:
+                self.rejected += 1
+                raise ClientLimitExceeded(f"At most {self.max_per_client} jobs in flight per client")
+            if self._queue.qsize() >= self.max_queued:
+                self.rejected += 1
+                raise JobQueueFull(f"Job queue is full ({self.max_queued} pending)")
+
+            job = Job(fn, key=key, client=client, meta=meta)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._by_key[key] = job
+            if client is not None:
+                self._active_by_client[client] = self._active_by_client.get(client, 0) + 1
+            self.submitted += 1
+            self._start()
+        self._queue.put(job)
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "running": sum(1 for j in self._jobs.values() if j.status == "running"),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            try:
+                job.result = job.fn()
+                job.status = "done"
+            except Exception as e:
+                print(f"Job Error ({job.id}): {e}")
+                job.error = self.error_message
+                job.status = "error"
+            job.finished_at = time.time()
+            with self._lock:
+                if job.status == "done":
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                if job.client is not None:
+                    remaining = self._active_by_client.get(job.client, 1) - 1
+                    if remaining > 0:
+                        self._active_by_client[job.client] = remaining
+                    else:
+                        self._active_by_client.pop(job.client, None)
+            if self.on_done is not None:
+                try:
+                    self.on_done(job)
+                except Exception as e:
+                    print(f"Job Callback Error ({job.id}): {e}")
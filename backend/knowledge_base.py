@@ -0,0 +1,293 @@
+"""
+In-process cache of the chat assistant's knowledge base.
+
+``handle_chat`` used to re-read the whole ``businesses`` table and rebuild
+the prompt text on every ``chat_message``.  ``KnowledgeBase`` keeps the
+visible rows in memory, stamped with a ``version`` that increases whenever
+the content changes.  Write routes call ``invalidate()``; the next reader
+then pulls only the rows whose ``updated_at`` moved past the last seen
+value.  Deletes cannot be seen through ``updated_at``, so they are passed
+explicitly (and a periodic full reload catches anything done outside the
+API).
+
+``RetrievalIndex`` sits on top of it and keeps a ``recommendation.Recommender``
+fitted over the same rows, so each chat message only carries the top-k
+businesses that match it instead of the whole directory.  Every row is
+stamped with the version that last changed it, so the index applies only
+those rows (``Recommender.add``/``remove``) instead of refitting.
+"""
+
+import json
+import os
+import threading
+import time
+
+from db import get_conn
+from recommendation import Business, Recommender, extract_tags
+
+
+KB_HEADER = "Directorio de Negocios de Welfare School:\n\n"
+KB_REFRESH_INTERVAL = float(os.getenv("KB_REFRESH_INTERVAL", "60"))
+KB_FULL_RELOAD_INTERVAL = float(os.getenv("KB_FULL_RELOAD_INTERVAL", "3600"))
+CHAT_TOP_K = int(os.getenv("CHAT_TOP_K", "8"))
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "1500"))
+CHAT_MIN_SCORE = float(os.getenv("CHAT_MIN_SCORE", "0.01"))
+
+# Everything a directory card needs, so ``search_index`` can answer from memory too.
+KB_COLUMNS = """
+    id, surname, business_name, category, description, discount, email, show_email,
+    phone, show_phone, website, logo_url, background_url, tags, status, created_at, updated_at
+"""
+
+
+def format_business_line(b) -> str:
+    return f"- **{b.get('business_name')}** ({b.get('category')}): {b.get('description')}. [Descuento: {b.get('discount')}]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting Spanish/English prompts.
+    return len(text) // 4 + 1
+
+
+def row_to_business(row) -> Business:
+    tags = row.get("tags")
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except Exception:
+            tags = []
+    tags = [str(t) for t in (tags or [])]
+    description = row.get("description") or ""
+    for tag in extract_tags(description):
+        if tag not in tags:
+            tags.append(tag)
+    return Business(
+        id=str(row.get("id")),
+        name=row.get("business_name") or "",
+        category=row.get("category") or "",
+        discount=row.get("discount") or "",
+        city="",
+        description=description,
+        tags=tags,
+    )
+
+
+class KnowledgeBase:
+    """Versioned, incrementally refreshed copy of the non-rejected businesses."""
+
+    def __init__(self, refresh_interval=KB_REFRESH_INTERVAL, full_reload_interval=KB_FULL_RELOAD_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.version = 0
+
+        self._rows = {}
+        self._lines = {}
+        self._text = None
+        self._high_water = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._dirty = True
+        self._pending_deletes = set()
+        self._row_versions = {}
+        self._deleted_versions = {}
+        self._reload_version = 0
+
+        self._state_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    # -- writers -----------------------------------------------------------
+
+    def invalidate(self, deleted_id=None):
+        """Mark the cache stale; ``deleted_id`` drops that row on the next refresh."""
+        with self._state_lock:
+            self._dirty = True
+            if deleted_id is not None:
+                self._pending_deletes.add(deleted_id)
+
+    # -- readers -----------------------------------------------------------
+
+    def text(self) -> str:
+        self.ensure_fresh()
+        text = self._text
+        if text is None:
+            with self._state_lock:
+                if self._text is None:
+                    self._text = KB_HEADER + "".join(self._lines.values())
+                text = self._text
+        return text
+
+    def rows(self):
+        """Return ``(version, rows)``; ``rows`` is a snapshot list of dicts."""
+        self.ensure_fresh()
+        with self._state_lock:
+            return self.version, list(self._rows.values())
+
+    def changes_since(self, version):
+        """Return ``(version, upserts, deleted_ids)`` since ``version``.
+
+        ``upserts`` is ``None`` when the table was fully reloaded after
+        ``version`` (or ``version`` is ``None``); callers should rebuild from
+        ``rows()`` in that case.
+        """
+        self.ensure_fresh()
+        with self._state_lock:
+            if version is None or version < self._reload_version:
+                return self.version, None, None
+            upserts = [self._rows[i] for i, v in self._row_versions.items() if v > version]
+            deleted = [i for i, v in self._deleted_versions.items() if v > version]
+            return self.version, upserts, deleted
+
+    def ensure_fresh(self):
+        if not self._needs_refresh():
+            return
+        # Single flight: concurrent callers queue here and find the work done.
+        with self._refresh_lock:
+            if not self._needs_refresh():
+                return
+            self._refresh()
+
+    # -- internals ---------------------------------------------------------
+
+    def _needs_refresh(self):
+        if self._dirty:
+            return True
+        return time.monotonic() - self._checked_at > self.refresh_interval
+
+    def _refresh(self):
+        with self._state_lock:
+            full = self._high_water is None or (
+                time.monotonic() - self._loaded_at > self.full_reload_interval
+            )
+            deletes = self._pending_deletes
+            self._pending_deletes = set()
+            self._dirty = False
+
+        try:
+            with get_conn() as conn:
+                with conn.cursor() as cur:
+                    if full:
+                        cur.execute(f"SELECT {KB_COLUMNS} FROM businesses WHERE status != 'rejected'")
+                    else:
+                        # >= because TIMESTAMP has one-second resolution; re-applying a row is harmless.
+                        cur.execute(
+                            f"SELECT {KB_COLUMNS} FROM businesses WHERE updated_at >= %s",
+                            (self._high_water,),
+                        )
+                    changed = cur.fetchall()
+        except Exception:
+            with self._state_lock:
+                self._dirty = True
+                self._pending_deletes |= deletes
+            raise
+
+        with self._state_lock:
+            version = self.version + 1
+            if full:
+                self._rows = {}
+                self._lines = {}
+                self._row_versions = {}
+                self._deleted_versions = {}
+                self._reload_version = version
+                self._high_water = None
+                self._loaded_at = time.monotonic()
+            modified = full
+            for biz_id in deletes:
+                if self._drop(biz_id, version):
+                    modified = True
+            for row in changed:
+                updated_at = row.get("updated_at")
+                if updated_at is not None and (self._high_water is None or updated_at > self._high_water):
+                    self._high_water = updated_at
+                biz_id = row["id"]
+                if row.get("status") == "rejected":
+                    if self._drop(biz_id, version):
+                        modified = True
+                    continue
+                line = format_business_line(row)
+                if self._lines.get(biz_id) != line or self._rows.get(biz_id) != row:
+                    self._rows[biz_id] = row
+                    self._lines[biz_id] = line
+                    self._row_versions[biz_id] = version
+                    self._deleted_versions.pop(biz_id, None)
+                    modified = True
+            if modified:
+                self.version = version
+                self._text = None
+            self._checked_at = time.monotonic()
+
+    def _drop(self, biz_id, version):
+        if self._rows.pop(biz_id, None) is None:
+            return False
+        self._lines.pop(biz_id, None)
+        self._row_versions.pop(biz_id, None)
+        self._deleted_versions[biz_id] = version
+        return True
+
+
+class RetrievalIndex:
+    """TF-IDF index over the knowledge base, kept in sync with its changes."""
+
+    def __init__(self, kb: KnowledgeBase, top_k=CHAT_TOP_K, token_budget=CHAT_CONTEXT_TOKENS,
+                 min_score=CHAT_MIN_SCORE):
+        self.kb = kb
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.min_score = min_score
+        self.version = None
+        self._recommender = None
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def _current(self):
+        self.kb.ensure_fresh()
+        if self.kb.version != self.version:
+            with self._lock:
+                if self.kb.version != self.version:
+                    self._sync()
+        return self._recommender, self._rows
+
+    def _sync(self):
+        version, upserts, deleted = self.kb.changes_since(self.version)
+        if upserts is None or self._recommender is None:
+            version, rows = self.kb.rows()
+            businesses = [row_to_business(r) for r in rows]
+            self._recommender = Recommender(businesses) if businesses else None
+            self._rows = {str(r["id"]): r for r in rows}
+        else:
+            for biz_id in deleted:
+                self._recommender.remove(str(biz_id))
+                self._rows.pop(str(biz_id), None)
+            for row in upserts:
+                self._recommender.update(row_to_business(row))
+                self._rows[str(row["id"])] = row
+        self.version = version
+
+    def search(self, query: str, top_k=None):
+        """Return the rows most similar to ``query`` (scoring at least ``min_score``)."""
+        recommender, rows = self._current()
+        if recommender is None:
+            return []
+        top_k = top_k or self.top_k
+        with self._lock:
+            results = recommender.query(query, top_k=top_k, min_score=self.min_score)
+        return [rows[biz.id] for biz, _, _ in results]
+
+    def context_for(self, query: str, top_k=None, token_budget=None) -> str:
+        """Build the prompt context for one chat message within the token budget."""
+        token_budget = token_budget or self.token_budget
+        matches = self.search(query, top_k)
+        if not matches:
+            # Nothing matched lexically (e.g. "what do you have?"): show a few anyway.
+            _, rows = self._current()
+            matches = list(rows.values())[-(top_k or self.top_k):]
+
+        parts = [KB_HEADER]
+        used = estimate_tokens(KB_HEADER)
+        for row in matches:
+            line = format_business_line(row)
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                break
+            parts.append(line)
+            used += cost
+        return "".join(parts)
@@ -0,0 +1,269 @@
+"""
+Lightweight in-process metrics.
+
+``LatencyTracker`` keeps recent-window percentiles for ``GET /health``.
+``Counter``, ``Gauge`` and ``Histogram`` live in a ``Registry`` and are
+rendered in the Prometheus text format by ``GET /metrics``; recording is a
+dict lookup and an add under a lock, so they are cheap enough for every
+request and every query.  ``Registry.register_stats`` publishes the numeric
+fields of an existing ``stats()`` dict as gauges at scrape time.
+
+Sampled traces: with ``TRACE_SAMPLE_RATE`` > 0 that fraction of requests
+(and chat messages) records the duration of each ``span()`` inside it and
+prints one ``TRACE {...}`` JSON line when it finishes.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# Seconds; covers a cached GET (sub-millisecond) up to a slow OpenAI call.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyTracker:
+    """Count and recent-window percentiles of a duration (seconds in, ms out)."""
+
+    def __init__(self, window=500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+            total = self.total
+        if not samples:
+            return {"count": count}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 3),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(samples[-1] * 1000, 3),
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; ``observe`` is a ``bisect`` and three adds."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+        lines = self._header()
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = (("le", _number(bound)),)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(round(total, 6))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self, prefix="welfare_"):
+        self.prefix = prefix
+        self._metrics = []
+        self._stats = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(self.prefix + name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(self.prefix + name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self.prefix + name, help_text, labels, buckets))
+
+    def register_stats(self, name, stats):
+        """Expose the numeric values of ``stats()`` (nested dicts flattened) as ``<prefix><name>_<key>`` gauges."""
+        self._stats.append((self.prefix + name, stats))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, stats in self._stats:
+            try:
+                data = stats()
+            except Exception as e:
+                print(f"Metrics Stats Error ({name}): {e}")
+                continue
+            for key, value in _flatten(data):
+                lines.append(f"# TYPE {name}_{key} gauge")
+                lines.append(f"{name}_{key} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(data, prefix=""):
+    for key, value in data.items():
+        key = prefix + "".join(c if c.isalnum() else "_" for c in str(key))
+        if isinstance(value, dict):
+            yield from _flatten(value, key + "_")
+        elif isinstance(value, bool):
+            yield key, int(value)
+        elif isinstance(value, (int, float)):
+            yield key, value
+
+
+REGISTRY = Registry()
+
+
+# -- sampled traces ----------------------------------------------------------------
+
+_trace_local = threading.local()
+
+
+class Trace:
+    __slots__ = ("name", "started", "spans", "fields")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+        self.fields = {}
+
+
+def start_trace(name, sample_rate=None):
+    """Begin a trace for the current request/greenlet with probability ``sample_rate``."""
+    rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    trace = Trace(name) if rate > 0 and random.random() < rate else None
+    _trace_local.trace = trace
+    return trace
+
+
+def current_trace():
+    return getattr(_trace_local, "trace", None)
+
+
+def add_span(name, seconds, **fields):
+    """Record an already-timed step on the current trace (no-op when not sampled)."""
+    trace = getattr(_trace_local, "trace", None)
+    if trace is not None:
+        span = {"name": name, "ms": round(seconds * 1000, 3)}
+        span.update(fields)
+        trace.spans.append(span)
+
+
+@contextmanager
+def span(name, **fields):
+    if getattr(_trace_local, "trace", None) is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - started, **fields)
+
+
+def finish_trace(**fields):
+    """Print the current trace, if any, as one ``TRACE`` JSON line and clear it."""
+    trace = getattr(_trace_local, "trace", None)
+    _trace_local.trace = None
+    if trace is None:
+        return
+    record = {"trace": trace.name, "ms": round((time.perf_counter() - trace.started) * 1000, 3)}
+    record.update(trace.fields)
+    record.update(fields)
+    record["spans"] = trace.spans
+    print("TRACE " + json.dumps(record, default=str))
@@ -18,21 +18,27 @@ The pipeline comprises four stages:
    discount.  These fields mimic the schema of the user's MariaDB table.
 
 2. **Tag extraction** – A heuristic function scans each description for
-   domain‑specific keywords and returns a list of normalised tags.  In a
+   domain‑specific keywords (listed in ``tag_patterns.json``) and returns a
+   list of normalised tags.  ``TagMatcher`` loads the table once into
+   dictionaries keyed by word, so the text is split into words a single
+   time and looked up against them.  In a
    production setting this step would use a small LLM such as
    ``smollm2:360m`` via Ollama, but for this demo we avoid external
    dependencies by using simple pattern matching and accent removal.
 
-3. **Vectorisation** – A ``TfidfVectorizer`` from scikit‑learn encodes
-   each business's document (a concatenation of name, category, tags and
-   description) into a TF‑IDF vector.  These vectors serve as a compact
+3. **Vectorisation** – A ``CountVectorizer`` from scikit‑learn plus the
+   IDF weighting of ``TfidfVectorizer`` encode each business's document
+   (a concatenation of name, category, tags and description) into a
+   TF‑IDF vector.  These vectors serve as a compact
    representation of the semantic content for similarity search.  Since
    our dataset is tiny, TF‑IDF is sufficient and very lightweight.
 
 4. **Query handling** – When the user supplies a free‑text query, the
    system generates tags from the query (using the same heuristic),
    constructs a query vector with the trained vectoriser, and computes
-   cosine similarities to all business vectors.  The top matches are
+   cosine similarities to the business vectors.  Rows are already
+   L2‑normalised, so this is a sparse product over the postings of the
+   query terms, followed by a partial (``argpartition``) top‑k selection.  The top matches are
    returned as recommendations along with a short explanation based on
    overlapping tags.
 
@@ -47,18 +53,46 @@ and display recommendations.  You can also call it with
 ``--query "tu consulta"`` to avoid the prompt.  Finally, running it
 without arguments will dump the dataset with extracted tags for
 inspection.
+
+The fitted index can be built offline and saved to a directory with
+``--save-index DIR`` (optionally over the real table with ``--from-db``).
+The vocabulary and IDF weights are stored next to the CSR arrays of the
+TF‑IDF matrix and of its term‑major transpose (the postings queries are
+scored against), which ``Recommender.load`` memory-maps, so a worker can
+answer queries right away without refitting or copying the matrix:
+
+```
+python recommendation.py --from-db --save-index /var/lib/welfare/index
+python recommendation.py --index /var/lib/welfare/index --query "tacos baratos"
+```
+
+Many queries can be scored at once with ``Recommender.query_batch`` or, from
+the command line, by streaming a file with one query per line:
+
+```
+python recommendation.py --index DIR --queries-file queries.txt --output results.jsonl
+```
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import re
+import sys
 import unicodedata
-from dataclasses import dataclass, field
-from typing import List, Tuple, Dict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple, Dict, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+INDEX_FORMAT_VERSION = 2
+# Format 1 indexes lack the postings arrays; they are rebuilt in memory on load.
+READABLE_INDEX_FORMATS = {1, 2}
 
 # ---------------------------------------------------------------------------
 # Data definitions
@@ -87,103 +121,492 @@ class Business:
 # Tag extraction logic
 # ---------------------------------------------------------------------------
 
+TAG_PATTERNS_FILE = Path(__file__).resolve().parent / "tag_patterns.json"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1)
+def _combining_re() -> "re.Pattern[str]":
+    """Character class of every combining mark in the BMP, built once."""
+    ranges = []
+    start = prev = None
+    for cp in range(0x300, 0x10000):
+        if unicodedata.combining(chr(cp)):
+            if start is None:
+                start = cp
+            elif cp != prev + 1:
+                ranges.append((start, prev))
+                start = cp
+            prev = cp
+    if start is not None:
+        ranges.append((start, prev))
+    return re.compile("[" + "".join(f"\\u{a:04x}-\\u{b:04x}" for a, b in ranges) + "]+")
+
+
 def normalise(text: str) -> str:
     """Convert text to lower case and strip accents and special characters."""
     text = text.lower()
-    text = unicodedata.normalize("NFKD", text)
-    text = "".join(c for c in text if not unicodedata.combining(c))
-    return text
+    if text.isascii():
+        return text
+    return _combining_re().sub("", unicodedata.normalize("NFKD", text))
+
+
+def _plural_forms(word: str) -> Tuple[str, ...]:
+    """A keyword and the plural spellings it should also match ("masaje" -> "masajes")."""
+    return (word, word + "s", word + "es")
+
+
+class TagMatcher:
+    """Keyword table compiled into a word‑level lookup, matched in one pass.
+
+    Every keyword is indexed under its first word (single‑word keywords also
+    under their plural forms), so the text is split into words once and
+    intersected with the index; multi‑word keywords are then confirmed
+    against the following words.  Matching happens on whole words only
+    (``"pan"`` no longer matches inside ``"pantalla"``) and the cost no
+    longer grows with the number of keywords.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]) -> None:
+        self.tag_order = {tag.replace(" ", "-"): i for i, tag in enumerate(patterns)}
+        keyword_tags: Dict[Tuple[str, ...], set] = {}
+        for tag, keywords in patterns.items():
+            for keyword in keywords:
+                words = tuple(_WORD_RE.findall(normalise(keyword)))
+                if words:
+                    keyword_tags.setdefault(words, set()).add(tag.replace(" ", "-"))
+
+        # word -> tags of the single-word keywords it spells (plurals included)
+        self._single: Dict[str, frozenset] = {}
+        # first word -> [(middle words, accepted forms of the last word, tags)]
+        self._multi: Dict[str, List[Tuple[Tuple[str, ...], frozenset, frozenset]]] = {}
+        for words, tags in keyword_tags.items():
+            last_forms = frozenset(_plural_forms(words[-1]))
+            if len(words) == 1:
+                for form in last_forms:
+                    self._single[form] = self._single.get(form, frozenset()) | tags
+            else:
+                self._multi.setdefault(words[0], []).append((words[1:-1], last_forms, frozenset(tags)))
+
+    @classmethod
+    def from_file(cls, path=TAG_PATTERNS_FILE) -> "TagMatcher":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def extract(self, text: str) -> List[str]:
+        words = _WORD_RE.findall(normalise(text))
+        present = set(words)
+        found: set = set()
+        for word in present & self._single.keys():
+            found |= self._single[word]
+        if not present.isdisjoint(self._multi):
+            for i, word in enumerate(words):
+                for middle, last_forms, tags in self._multi.get(word, ()):
+                    end = i + 1 + len(middle)
+                    if end < len(words) and words[end] in last_forms and tuple(words[i + 1:end]) == middle:
+                        found |= tags
+        return sorted(found, key=self.tag_order.__getitem__)
+
+
+@lru_cache(maxsize=1)
+def default_tag_matcher() -> TagMatcher:
+    """Matcher for ``tag_patterns.json``, compiled on first use."""
+    return TagMatcher.from_file()
 
 
 def extract_tags(description: str) -> List[str]:
     """Extract a list of tags from the description using simple heuristics.
 
-    This function searches for keywords defined in a static dictionary and
+    This function searches for keywords defined in ``tag_patterns.json`` and
     returns normalised tags.  It is a stand‑in for a small language model
     used in production.  The returned tags are in kebab‑case (words joined
-    by hyphens) and deduplicated.
+    by hyphens), deduplicated and in the order of the keyword table.
     """
-    text = normalise(description)
-    tags: List[str] = []
-
-    # Predefined keyword groups for different concepts
-    TAG_PATTERNS: Dict[str, List[str]] = {
-        "barberia": ["barberia", "peluqueria", "corte de cabello", "cabello", "corte de pelo", "pelo", "barba", "fade", "taper"],
-        "cafe": ["cafe", "wifi", "postres", "trabajar", "tranquilo", "taza", "barista"],
-        "restaurante": ["restaurante", "cocina", "comida", "menu", "chef"],
-        "tacos": ["tacos", "pastor", "bistec", "gringas", "campesina"],
-        "sushi": ["sushi", "rolls", "ramen", "japonesa"],
-        "saludable": ["saludable", "vegano", "ensalada", "proteina", "light", "bowl"],
-        "spa": ["spa", "masaje", "relajacion", "facial", "aromaterapia"],
-        "reparacion": ["reparacion", "reparar", "celular", "laptop", "diagnostico", "garantia"],
-        "gym": ["gym", "gimnasio", "pesas", "entrenamiento", "fuerza", "24 horas"],
-        "farmacia": ["farmacia", "urgencia", "medicamento"],
-        "entretenimiento": ["cine", "karaoke", "boliche", "entretenimiento", "diversion"],
-        "panaderia": ["pan", "panaderia", "pan dulce", "horno"],
-        "postres": ["postre", "helado", "malteada", "dulce"],
-        "libreria": ["libreria", "libro", "papeleria", "estudio", "leer"],
-        "servicios": ["servicio", "lavanderia", "para llevar", "express"],
-        "barato": ["barato", "economico", "accesible", "promo", "descuento"],
-        "cita": ["cita", "romantico", "pareja"],
-        "tranquilo": ["tranquilo", "calmado", "relajado"],
-        "rapido": ["rapido", "expres", "agil"]
-    }
-
-    for tag, patterns in TAG_PATTERNS.items():
-        for pat in patterns:
-            if pat in text:
-                tags.append(tag)
-                break
-
-    # Deduplicate and normalise tags to kebab‑case
-    unique_tags: List[str] = []
-    seen: set[str] = set()
-    for tag in tags:
-        norm = tag.replace(" ", "-")
-        if norm not in seen:
-            seen.add(norm)
-            unique_tags.append(norm)
-    return unique_tags
+    return default_tag_matcher().extract(description)
 
 
 # ---------------------------------------------------------------------------
 # Recommendation engine
 # ---------------------------------------------------------------------------
 
+def smooth_idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    """IDF exactly as ``TfidfVectorizer(smooth_idf=True)`` computes it."""
+    return np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+
+
 class Recommender:
-    """A simple recommender using TF‑IDF vectors and cosine similarity."""
+    """A simple recommender using TF‑IDF vectors and cosine similarity.
+
+    The model is kept as plain arrays (vocabulary, IDF weights and a CSR
+    matrix of L2‑normalised rows) rather than a fitted ``TfidfVectorizer``,
+    so it can be saved with ``save`` and memory-mapped back with ``load``.
+
+    ``add``, ``update`` and ``remove`` change the index in place.  New rows
+    go to a small *delta* matrix and removed rows are tombstoned, so a
+    mutation only costs the rows it touches.  IDF weights are not refreshed
+    on every call: ``refresh`` folds the delta back into the main matrix,
+    drops tombstones and recomputes IDF, and it runs automatically once the
+    number of changes passes ``idf_refresh_ratio`` of the index or the delta
+    grows beyond ``max_delta_rows``.
+    """
 
-    def __init__(self, businesses: List[Business]) -> None:
-        # Fit TF‑IDF on the documents
-        self.vectoriser = TfidfVectorizer(stop_words=None)
-        docs = [b.doc_text for b in businesses]
-        self.matrix = self.vectoriser.fit_transform(docs)
-        self.businesses = businesses
+    def __init__(
+        self,
+        businesses: List[Business],
+        vocabulary: Optional[Dict[str, int]] = None,
+        idf: Optional[np.ndarray] = None,
+        matrix: Optional[sparse.csr_matrix] = None,
+        postings: Optional[sparse.csr_matrix] = None,
+        idf_refresh_ratio: float = 0.1,
+        max_delta_rows: int = 1024,
+    ) -> None:
+        self.businesses: List[Optional[Business]] = list(businesses)
+        self.idf_refresh_ratio = idf_refresh_ratio
+        self.max_delta_rows = max_delta_rows
+        self._analyser = CountVectorizer().build_analyzer()
+
+        if matrix is None:
+            # Fit TF‑IDF on the documents (raw counts are kept for incremental updates)
+            counter = CountVectorizer(stop_words=None)
+            counts = counter.fit_transform([b.doc_text for b in self.businesses]).tocsr()
+            vocabulary = {term: int(i) for term, i in counter.vocabulary_.items()}
+            df = np.bincount(counts.indices, minlength=len(vocabulary))
+            idf = smooth_idf(df, counts.shape[0])
+            matrix = self._weigh(counts, idf)
+            self._counts: Optional[sparse.csr_matrix] = counts
+            self._df: Optional[np.ndarray] = df
+        else:
+            # Loaded index: raw counts are only rebuilt if the index is mutated.
+            self._counts = None
+            self._df = None
+
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.matrix = matrix
+        self._terms = len(vocabulary)
+        self._positions = {b.id: i for i, b in enumerate(self.businesses)}
+        self._dead: set = set()
+        self._delta_counts: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._delta_matrix: Optional[sparse.csr_matrix] = None
+        self._idf_ext: Optional[np.ndarray] = None
+        self._postings_matrix: Optional[sparse.csr_matrix] = postings
+        self._changes = 0
+
+    # -- vectorisation -----------------------------------------------------
+
+    @staticmethod
+    def _weigh(counts: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+        """TF‑IDF weighting plus L2 row normalisation, in place on a copy of ``counts``."""
+        weighted = counts.astype(np.float64, copy=True).tocsr()
+        weighted.data *= np.asarray(idf)[weighted.indices]
+        row_ids = np.repeat(np.arange(weighted.shape[0]), np.diff(weighted.indptr))
+        norms = np.sqrt(np.bincount(row_ids, weights=weighted.data ** 2, minlength=weighted.shape[0]))
+        norms[norms == 0] = 1.0
+        weighted.data /= norms[row_ids]
+        return weighted
+
+    def _current_idf(self) -> np.ndarray:
+        """``self.idf`` extended with weights for terms added since the last refresh."""
+        if self._terms == len(self.idf):
+            return self.idf
+        if self._idf_ext is None or len(self._idf_ext) != self._terms:
+            new_df = self._df[len(self.idf): self._terms]
+            self._idf_ext = np.concatenate([self.idf, smooth_idf(new_df, len(self._positions))])
+        return self._idf_ext
+
+    def _count_rows(self, texts: List[str], grow: bool = False) -> sparse.csr_matrix:
+        """Raw term counts; unknown terms are added to the vocabulary if ``grow``."""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[int] = []
+        for text in texts:
+            row: Dict[int, int] = {}
+            for token in self._analyser(text):
+                idx = self.vocabulary.get(token)
+                if idx is None:
+                    if not grow:
+                        continue
+                    idx = self._add_term(token)
+                row[idx] = row.get(idx, 0) + 1
+            for idx in sorted(row):
+                indices.append(idx)
+                data.append(row[idx])
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(texts), self._terms),
+        )
+
+    def _add_term(self, token: str) -> int:
+        idx = self._terms
+        self.vocabulary[token] = idx
+        self._terms += 1
+        if len(self._df) < self._terms:
+            # Amortised growth so adding terms stays O(1) per term.
+            grown = np.zeros(max(16, 2 * len(self._df)), dtype=self._df.dtype)
+            grown[: len(self._df)] = self._df
+            self._df = grown
+        return idx
+
+    def vectorise(self, texts: List[str]) -> sparse.csr_matrix:
+        """Encode texts exactly like the fitted ``TfidfVectorizer`` would."""
+        return self._weigh(self._count_rows(texts), self._current_idf())
+
+    # -- incremental updates -----------------------------------------------
+
+    def _ensure_counts(self) -> None:
+        if self._counts is not None:
+            return
+        docs = [b.doc_text if b is not None else "" for b in self.businesses[: self.matrix.shape[0]]]
+        self._counts = self._count_rows(docs)
+        df = np.bincount(self._counts.indices, minlength=self._terms)
+        self._df = df.astype(np.int64)
+
+    def _row_counts(self, pos: int) -> sparse.csr_matrix:
+        main_rows = self.matrix.shape[0]
+        if pos < main_rows:
+            return self._counts[pos]
+        indices, data = self._delta_counts[pos - main_rows]
+        return sparse.csr_matrix((data, indices, [0, len(indices)]), shape=(1, self._terms))
+
+    def add(self, business: Business) -> None:
+        """Index a new business (or replace one with the same id)."""
+        if business.id in self._positions:
+            self.remove(business.id, _refresh=False)
+        self._ensure_counts()
+        row = self._count_rows([business.doc_text], grow=True)
+        self._df[row.indices] += 1
+        self._delta_counts.append((row.indices, row.data))
+        self._delta_matrix = None
+        self._idf_ext = None
+        self._positions[business.id] = len(self.businesses)
+        self.businesses.append(business)
+        self._changes += 1
+        self._maybe_refresh()
+
+    def update(self, business: Business) -> None:
+        """Re-index an existing business; unknown ids are added."""
+        self.add(business)
+
+    def remove(self, business_id: str, _refresh: bool = True) -> bool:
+        """Drop a business from the index; returns ``False`` if it was not indexed."""
+        pos = self._positions.pop(business_id, None)
+        if pos is None:
+            return False
+        self._ensure_counts()
+        self._df[self._row_counts(pos).indices] -= 1
+        self._dead.add(pos)
+        self.businesses[pos] = None
+        self._idf_ext = None
+        self._changes += 1
+        if _refresh:
+            self._maybe_refresh()
+        return True
+
+    def _maybe_refresh(self) -> None:
+        if (
+            self._changes > self.idf_refresh_ratio * max(len(self._positions), 1)
+            or len(self._delta_counts) > self.max_delta_rows
+        ):
+            self.refresh()
+
+    def refresh(self) -> None:
+        """Merge pending changes into the main matrix and recompute IDF."""
+        if not self._changes and not self._delta_counts and not self._dead:
+            return
+        self._ensure_counts()
+        main = self._counts
+        main.resize((main.shape[0], self._terms))
+        parts = [main]
+        if self._delta_counts:
+            parts.append(sparse.vstack([self._row_counts(main.shape[0] + i) for i in range(len(self._delta_counts))]))
+        counts = sparse.vstack(parts).tocsr()
+        alive = [i for i in range(counts.shape[0]) if i not in self._dead]
+        counts = counts[alive]
+        self.businesses = [self.businesses[i] for i in alive]
+        self._positions = {b.id: i for i, b in enumerate(self.businesses)}
+
+        self._counts = counts
+        self._df = np.bincount(counts.indices, minlength=self._terms).astype(np.int64)
+        self.idf = smooth_idf(self._df, counts.shape[0])
+        self.matrix = self._weigh(counts, self.idf)
+        self._postings_matrix = None
+        self._dead = set()
+        self._delta_counts = []
+        self._delta_matrix = None
+        self._idf_ext = None
+        self._changes = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    # -- scoring -----------------------------------------------------------
+
+    def _delta(self) -> Optional[sparse.csr_matrix]:
+        if not self._delta_counts:
+            return None
+        if self._delta_matrix is None or self._delta_matrix.shape[1] != self._terms:
+            main_rows = self.matrix.shape[0]
+            counts = sparse.vstack([self._row_counts(main_rows + i) for i in range(len(self._delta_counts))])
+            self._delta_matrix = self._weigh(counts.tocsr(), self._current_idf())
+        return self._delta_matrix
+
+    def _postings(self) -> sparse.csr_matrix:
+        """Term‑major copy of the main matrix (one row of postings per term).
+
+        A loaded index memory-maps the copy written by ``save``; otherwise it
+        is built once per fit or ``refresh``.
+        """
+        if self._postings_matrix is None:
+            self._postings_matrix = self.matrix.T.tocsr()
+        return self._postings_matrix
 
-    def query(self, text: str, top_k: int = 3) -> List[Tuple[Business, float, List[str]]]:
+    def _hits(self, q_vecs: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Similarity of each query row to the indexed rows that share a term with it.
+
+        Rows and queries are already L2‑normalised, so cosine similarity is a
+        plain sparse product.  Going through the postings only touches the
+        rows that contain a query term; everything else scores 0 and is
+        absent from the result.  Tombstoned rows are filtered by the caller.
+        """
+        main_cols = self.matrix.shape[1]
+        hits = q_vecs[:, :main_cols] @ self._postings()
+        delta = self._delta()
+        if delta is not None:
+            hits = sparse.hstack([hits, q_vecs @ delta.T])
+        return hits.tocsr()
+
+    def _rank(
+        self, rows: np.ndarray, sims: np.ndarray, top_k: int, min_score: Optional[float]
+    ) -> List[Tuple[int, float]]:
+        """Best ``top_k`` (row, score) pairs, best first, without a full sort."""
+        if top_k <= 0:
+            return []
+        keep = sims >= min_score if min_score is not None else np.ones(len(sims), dtype=bool)
+        if self._dead:
+            keep &= ~np.isin(rows, np.fromiter(self._dead, dtype=np.int64))
+        rows, sims = rows[keep], sims[keep]
+        if rows.size > top_k:
+            part = np.argpartition(-sims, top_k - 1)[:top_k]
+            rows, sims = rows[part], sims[part]
+        # Best score first; ties keep index order like the old stable sort.
+        order = np.lexsort((rows, -sims))
+        ranked = [(int(rows[i]), float(sims[i])) for i in order]
+
+        if len(ranked) < top_k and (min_score is None or min_score <= 0):
+            # Without a cutoff the old behaviour returned top_k rows even at score 0.
+            seen = {r for r, _ in ranked}
+            for pos in range(len(self.businesses)):
+                if len(ranked) >= top_k:
+                    break
+                if pos not in seen and pos not in self._dead:
+                    ranked.append((pos, 0.0))
+        return ranked
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path) -> None:
+        """Write the index to ``path`` (a directory) for ``Recommender.load``."""
+        self.refresh()
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        matrix = self.matrix.tocsr()
+        np.save(path / "idf.npy", np.asarray(self.idf, dtype=np.float64))
+        np.save(path / "data.npy", matrix.data)
+        np.save(path / "indices.npy", matrix.indices)
+        np.save(path / "indptr.npy", matrix.indptr)
+        postings = self._postings()
+        np.save(path / "postings_data.npy", postings.data)
+        np.save(path / "postings_indices.npy", postings.indices)
+        np.save(path / "postings_indptr.npy", postings.indptr)
+        meta = {
+            "format": INDEX_FORMAT_VERSION,
+            "shape": list(matrix.shape),
+            "vocabulary": self.vocabulary,
+            "businesses": [asdict(b) for b in self.businesses],
+        }
+        (path / "index.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "Recommender":
+        """Load an index written by ``save``; arrays are memory-mapped by default."""
+        path = Path(path)
+        meta = json.loads((path / "index.json").read_text(encoding="utf-8"))
+        if meta.get("format") not in READABLE_INDEX_FORMATS:
+            raise ValueError(f"Unsupported index format: {meta.get('format')}")
+        mode = "r" if mmap else None
+        idf = np.load(path / "idf.npy", mmap_mode=mode)
+        matrix = sparse.csr_matrix(
+            (
+                np.load(path / "data.npy", mmap_mode=mode),
+                np.load(path / "indices.npy", mmap_mode=mode),
+                np.load(path / "indptr.npy", mmap_mode=mode),
+            ),
+            shape=tuple(meta["shape"]),
+            copy=False,
+        )
+        postings = None
+        if (path / "postings_data.npy").exists():
+            postings = sparse.csr_matrix(
+                (
+                    np.load(path / "postings_data.npy", mmap_mode=mode),
+                    np.load(path / "postings_indices.npy", mmap_mode=mode),
+                    np.load(path / "postings_indptr.npy", mmap_mode=mode),
+                ),
+                shape=(matrix.shape[1], matrix.shape[0]),
+                copy=False,
+            )
+        businesses = [Business(**b) for b in meta["businesses"]]
+        return cls(businesses, vocabulary=meta["vocabulary"], idf=idf, matrix=matrix, postings=postings)
+
+    def query(
+        self, text: str, top_k: int = 3, min_score: Optional[float] = None
+    ) -> List[Tuple[Business, float, List[str]]]:
         """Return top_k businesses for the given query text.
 
         The query is vectorised with the same TF‑IDF model.  Tags are
         extracted from the query for interpretability.  The return value
         includes the business, the cosine similarity score and the list of
-        overlapping tags between the query and the business tags.
+        overlapping tags between the query and the business tags.  Results
+        scoring below ``min_score`` are dropped before ranking.
         """
         # Extract tags from the query
-        query_tags = extract_tags(text)
-        q_vec = self.vectoriser.transform([text])
-        sims = cosine_similarity(q_vec, self.matrix).flatten()
-        # Pair each business with its similarity
-        results = list(enumerate(sims))
-        # Sort by similarity descending
-        results.sort(key=lambda x: x[1], reverse=True)
-        top_results = results[:top_k]
+        query_tags = set(extract_tags(text))
+        hits = self._hits(self.vectorise([text]))
         recommendations: List[Tuple[Business, float, List[str]]] = []
-        for idx, score in top_results:
+        for idx, score in self._rank(hits.indices, hits.data, top_k, min_score):
             biz = self.businesses[idx]
-            overlap = sorted(set(query_tags) & set(biz.tags))
-            recommendations.append((biz, float(score), overlap))
+            overlap = sorted(query_tags & set(biz.tags))
+            recommendations.append((biz, score, overlap))
         return recommendations
 
+    def query_batch(
+        self,
+        texts: List[str],
+        top_k: int = 3,
+        min_score: Optional[float] = None,
+        batch_size: int = 256,
+    ) -> List[List[Tuple[Business, float, List[str]]]]:
+        """Run ``query`` for many texts at once.
+
+        Each chunk of ``batch_size`` texts is vectorised in one pass and scored
+        with a single sparse matrix–matrix product; the results are the same
+        as calling ``query`` for every text.
+        """
+        results: List[List[Tuple[Business, float, List[str]]]] = []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start: start + batch_size]
+            hits = self._hits(self.vectorise(chunk))
+            for row, text in enumerate(chunk):
+                lo, hi = hits.indptr[row], hits.indptr[row + 1]
+                query_tags = set(extract_tags(text))
+                recommendations: List[Tuple[Business, float, List[str]]] = []
+                for idx, score in self._rank(hits.indices[lo:hi], hits.data[lo:hi], top_k, min_score):
+                    biz = self.businesses[idx]
+                    recommendations.append((biz, score, sorted(query_tags & set(biz.tags))))
+                results.append(recommendations)
+        return results
+
 
 # ---------------------------------------------------------------------------
 # Example dataset
@@ -264,10 +687,60 @@ def build_example_dataset() -> List[Business]:
     return examples
 
 
+def load_businesses_from_db() -> List[Business]:
+    """Read the non-rejected rows of the ``businesses`` table (needs ``backend/db.py``)."""
+    from db import get_conn
+    from knowledge_base import KB_COLUMNS, row_to_business
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {KB_COLUMNS} FROM businesses WHERE status != 'rejected'")
+            return [row_to_business(row) for row in cur.fetchall()]
+
+
 # ---------------------------------------------------------------------------
 # Command‑line interface
 # ---------------------------------------------------------------------------
 
+def run_queries_file(rec: Recommender, queries_path: str, output_path: Optional[str],
+                     top_k: int, min_score: Optional[float], batch_size: int = 256) -> int:
+    """Stream queries (one per line) through ``query_batch`` and write JSONL results."""
+    source = sys.stdin if queries_path == "-" else open(queries_path, encoding="utf-8")
+    sink = sys.stdout if not output_path or output_path == "-" else open(output_path, "w", encoding="utf-8")
+    written = 0
+
+    def flush(batch: List[str]) -> None:
+        nonlocal written
+        for text, recs in zip(batch, rec.query_batch(batch, top_k=top_k, min_score=min_score, batch_size=batch_size)):
+            sink.write(json.dumps({
+                "query": text,
+                "results": [
+                    {"id": biz.id, "name": biz.name, "score": round(score, 6), "tags": overlap}
+                    for biz, score, overlap in recs
+                ],
+            }, ensure_ascii=False) + "\n")
+            written += 1
+
+    try:
+        batch: List[str] = []
+        for line in source:
+            text = line.strip()
+            if not text:
+                continue
+            batch.append(text)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    return written
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Demo de sistema de recomendaciones.")
     parser.add_argument(
@@ -276,12 +749,44 @@ def main() -> None:
     parser.add_argument(
         "--query", type=str, help="Ejecutar una consulta y mostrar recomendaciones."
     )
+    parser.add_argument(
+        "--from-db", action="store_true", help="Usar la tabla businesses en lugar del dataset de ejemplo."
+    )
+    parser.add_argument(
+        "--save-index", type=str, metavar="DIR", help="Guardar el índice entrenado en DIR."
+    )
+    parser.add_argument(
+        "--index", type=str, metavar="DIR", help="Cargar un índice guardado (sin reentrenar)."
+    )
+    parser.add_argument(
+        "--queries-file", type=str, metavar="FILE",
+        help="Procesar consultas (una por línea, '-' para stdin) y escribir resultados JSONL.",
+    )
+    parser.add_argument(
+        "--output", type=str, metavar="FILE", help="Archivo JSONL de salida para --queries-file (default stdout)."
+    )
+    parser.add_argument("--top-k", type=int, default=3, help="Resultados por consulta.")
+    parser.add_argument("--min-score", type=float, default=None, help="Similitud mínima para incluir un resultado.")
     args = parser.parse_args()
 
-    businesses = build_example_dataset()
-    rec = Recommender(businesses)
-
-    if args.demo or args.query:
+    if args.index:
+        rec = Recommender.load(args.index)
+        businesses = rec.businesses
+    else:
+        businesses = load_businesses_from_db() if args.from_db else build_example_dataset()
+        rec = Recommender(businesses)
+
+    if args.save_index:
+        rec.save(args.save_index)
+        print(f"Índice guardado en {args.save_index} ({len(businesses)} negocios, {len(rec.vocabulary)} términos)",
+              file=sys.stderr)
+        if not (args.demo or args.query or args.queries_file):
+            return
+
+    if args.queries_file:
+        count = run_queries_file(rec, args.queries_file, args.output, args.top_k, args.min_score)
+        print(f"{count} consultas procesadas", file=sys.stderr)
+    elif args.demo or args.query:
         query = args.query
         if not query:
             # Interactive prompt
@@ -291,7 +796,7 @@ def main() -> None:
             print()
             query = input("Ingresa tu consulta (por ejemplo: 'quiero sushi barato para una cita'): ")
 
-        recommendations = rec.query(query, top_k=3)
+        recommendations = rec.query(query, top_k=args.top_k, min_score=args.min_score)
         print()
         print(f"Recomendaciones para la consulta: '{query}'")
         for i, (biz, score, overlap) in enumerate(recommendations, 1):
@@ -0,0 +1,134 @@
+"""
+Short-TTL cache for public GET responses, with strong ETags.
+
+Entries are keyed by route and query string and grouped by namespace
+(``"businesses"``, ``"videos"``) so write routes can drop every cached page
+of a resource with ``invalidate(namespace)``.  A request whose
+``If-None-Match`` matches a live entry gets a ``304`` without running the
+view (and therefore without touching the DB).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "10"))
+
+
+class _Entry:
+    __slots__ = ("body", "etag", "mimetype", "expires_at")
+
+    def __init__(self, body, etag, mimetype, expires_at):
+        self.body = body
+        self.etag = etag
+        self.mimetype = mimetype
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 max_age=RESPONSE_CACHE_MAX_AGE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def invalidate(self, namespace):
+        """Drop every cached response of ``namespace``."""
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            for namespace in list(self._generations):
+                self._generations[namespace] += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry, generation):
+        with self._lock:
+            # A write landed while the view was running: the body may be stale.
+            if self._generations.get(key[0], 0) != generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _respond(self, entry):
+        headers = {
+            "ETag": f'"{entry.etag}"',
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+        if entry.etag in request.if_none_match:
+            self.not_modified += 1
+            return Response(status=304, headers=headers)
+        return Response(entry.body, status=200, mimetype=entry.mimetype, headers=headers)
+
+    def cached(self, namespace):
+        """Decorator for GET views whose 200 responses may be shared between clients."""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (namespace, request.path, tuple(sorted(request.args.items(multi=True))))
+                entry = self._get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return self._respond(entry)
+
+                self.misses += 1
+                with self._lock:
+                    generation = self._generations.get(namespace, 0)
+                response = make_response(view(*args, **kwargs))
+                # Errors, streams and fallbacks marked no-store are never shared.
+                if (response.status_code != 200 or response.direct_passthrough
+                        or response.cache_control.no_store):
+                    return response
+                body = response.get_data()
+                entry = _Entry(
+                    body=body,
+                    etag=hashlib.sha256(body).hexdigest()[:32],
+                    mimetype=response.mimetype,
+                    expires_at=time.monotonic() + self.ttl,
+                )
+                self._put(key, entry, generation)
+                return self._respond(entry)
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,237 @@
+"""
+Multi-worker demo: throughput against worker count, plus the cross-worker checks.
+
+For each count in ``--workers`` it starts that many ``python app.py``
+processes on consecutive ports (``SKIP_DB_WRITE=1``, stub OpenAI and
+covers, uploads in a temp dir), all sharing one message queue.  That is
+``fake_redis.py`` unless ``--redis-url`` is given.  It then checks, with
+two or more workers:
+
+* Socket.IO across workers: a client connected to the first worker gets the
+  ``cover_job_done`` emitted by the last one (the job is posted there);
+* invalidation: an event published on the bus reaches every worker.
+
+Then it loads the workers for ``--duration`` seconds from ``--clients``
+processes with keep-alive connections spread over the ports, as nginx
+``ip_hash`` would, and reports req/s and latency for each count::
+
+    python scale_demo.py --workers 1,2,4 --duration 10 --output scale.json
+
+Throughput can only grow while there are free cores: the report includes
+``os.cpu_count()``, and the client processes compete for the same cores.
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+import fake_redis
+from bench import percentile
+from invalidation import InvalidationBus
+
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def start_workers(count, base_port, redis_url, workdir, cache_ttl):
+    workers = []
+    for i in range(count):
+        port = base_port + i
+        env = dict(
+            os.environ,
+            PORT=str(port),
+            SKIP_DB_WRITE="1",
+            CHAT_PROVIDER="stub",
+            COVER_IMAGE_PROVIDER="stub",
+            SOCKETIO_MESSAGE_QUEUE=redis_url,
+            UPLOAD_DIR=str(workdir / "uploads"),
+            AI_CACHE_PATH=str(workdir / "ai_cache.sqlite3"),
+            RESPONSE_CACHE_TTL=str(cache_ttl),
+            FLASK_DEBUG="false",
+        )
+        log = open(workdir / f"worker-{port}.log", "wb")
+        proc = subprocess.Popen([sys.executable, "app.py"], cwd=BACKEND_DIR, env=env, stdout=log, stderr=log)
+        workers.append((port, proc, log))
+    deadline = time.monotonic() + 60
+    for port, proc, _ in workers:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"worker on port {port} exited; see {workdir}/worker-{port}.log")
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"worker on port {port} did not start")
+            time.sleep(0.2)
+    return workers
+
+
+def stop_workers(workers):
+    for _, proc, _ in workers:
+        proc.terminate()
+    for _, proc, log in workers:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+
+
+def check_socketio(ports):
+    """Connect to ``ports[0]``, queue a cover on ``ports[-1]``, wait for its ``cover_job_done``."""
+    import socketio
+
+    done = threading.Event()
+    client = socketio.Client()
+    client.on("cover_job_done", lambda data: done.set())
+    client.connect(f"http://127.0.0.1:{ports[0]}", transports=["polling"])
+    try:
+        res = requests.post(
+            f"http://127.0.0.1:{ports[-1]}/ai/generate-cover",
+            json={"business_name": f"Scale demo {time.time()}", "socket_id": client.get_sid()},
+            timeout=10,
+        )
+        return res.status_code in (200, 202) and (res.status_code == 200 or done.wait(15))
+    finally:
+        client.disconnect()
+
+
+def check_invalidation(ports, redis_url):
+    """Publish one event on the bus and wait until every worker has received it."""
+    def received():
+        return [requests.get(f"http://127.0.0.1:{p}/health", timeout=5).json()["invalidation"]["received"]
+                for p in ports]
+
+    before = received()
+    bus = InvalidationBus(redis_url)
+    bus.start()
+    deadline = time.monotonic() + 10
+    while not bus.connected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    bus.publish("businesses")
+    while time.monotonic() < deadline:
+        if all(after > prior for after, prior in zip(received(), before)):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _client_process(args):
+    ports, path, duration, connections, offset = args
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def run(slot):
+        # One keep-alive connection per thread, pinned to a worker like a sticky session.
+        port = ports[(offset + slot) % len(ports)]
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        local = []
+        failed = 0
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                res = conn.getresponse()
+                res.read()
+                ok = res.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            local.append(time.perf_counter() - started)
+            failed += not ok
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def load(ports, path, duration, clients, connections):
+    jobs = [(ports, path, duration, connections, i * connections) for i in range(clients)]
+    started = time.perf_counter()
+    with multiprocessing.Pool(clients) as pool:
+        parts = pool.map(_client_process, jobs)
+    wall = time.perf_counter() - started
+    latencies = sorted(latency for part, _ in parts for latency in part)
+    errors = sum(failed for _, failed in parts)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / min(wall, duration), 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput against worker count.")
+    parser.add_argument("--workers", default="1,2,4", help="Worker counts to try (comma separated)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per count")
+    parser.add_argument("--clients", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--connections", type=int, default=8, help="Keep-alive connections per client process")
+    parser.add_argument("--path", default="/businesses?limit=24", help="GET path to load")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="RESPONSE_CACHE_TTL for the workers")
+    parser.add_argument("--base-port", type=int, default=5101)
+    parser.add_argument("--redis-url", help="Use this Redis instead of starting fake_redis.py")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    redis_url = args.redis_url
+    if redis_url is None:
+        _, redis_url = fake_redis.start()
+    counts = [int(c) for c in args.workers.split(",") if c.strip()]
+    report = {"cpus": os.cpu_count(), "path": args.path, "redis_url": redis_url, "runs": {}}
+    print(f"{os.cpu_count()} CPUs, message queue {redis_url}")
+    baseline = None
+    for count in counts:
+        workdir = Path(tempfile.mkdtemp(prefix="welfare-scale-"))
+        workers = start_workers(count, args.base_port, redis_url, workdir, args.cache_ttl)
+        try:
+            ports = [port for port, _, _ in workers]
+            result = {}
+            if count > 1:
+                result["socketio_cross_worker"] = check_socketio(ports)
+                result["invalidation_all_workers"] = check_invalidation(ports, redis_url)
+            result.update(load(ports, args.path, args.duration, args.clients, args.connections))
+        finally:
+            stop_workers(workers)
+            shutil.rmtree(workdir, ignore_errors=True)
+        baseline = baseline or result["rps"]
+        result["speedup"] = round(result["rps"] / baseline, 2) if baseline else None
+        report["runs"][str(count)] = result
+        checks = "".join(
+            f"  {name} {'ok' if result[name] else 'FAILED'}"
+            for name in ("socketio_cross_worker", "invalidation_all_workers") if name in result
+        )
+        print(f"workers {count}: {result['rps']:>8} req/s  x{result['speedup']}  p50 {result['p50_ms']} ms  "
+              f"p95 {result['p95_ms']} ms  errors {result['errors']}{checks}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
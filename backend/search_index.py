@@ -0,0 +1,211 @@
+"""
+In-process inverted index for the directory search (``GET /businesses/search``).
+
+Every business is split into accent-folded words (``recommendation.normalise``)
+from ``business_name``, ``category``, ``tags`` and ``description``; each
+word maps to the businesses containing it with a per-field weight, so a
+query only touches the postings of its own words.  The vocabulary is also
+kept sorted, which makes prefix lookups (type-ahead: ``"cafe"`` finds
+``"cafeteria"``) a ``bisect`` plus a short scan.
+
+The index follows ``KnowledgeBase`` the same way ``RetrievalIndex`` does:
+writes invalidate the knowledge base, and the next search applies only the
+rows that changed (``changes_since``), so searches never query the table
+themselves.
+"""
+
+import heapq
+import json
+import os
+import re
+import threading
+from bisect import bisect_left
+
+from recommendation import normalise
+
+
+SEARCH_MAX_EXPANSIONS = int(os.getenv("SEARCH_MAX_EXPANSIONS", "50"))
+# A prefix match counts for this fraction of an exact word match.
+PREFIX_WEIGHT = 0.5
+FIELD_WEIGHTS = (("business_name", 4.0), ("category", 2.0), ("tags", 2.0), ("description", 1.0))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text) -> list:
+    return _TOKEN_RE.findall(normalise(text or ""))
+
+
+def _field_text(row, name):
+    value = row.get(name)
+    if name == "tags" and isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return value if isinstance(value, str) else ""
+
+
+class SearchIndex:
+    """Word -> ``{doc: weight}`` postings over the knowledge base rows.
+
+    Documents are numbered internally so postings stay small; ``rows`` are
+    kept as given and must not be modified by callers.
+    """
+
+    def __init__(self, kb=None, max_expansions=SEARCH_MAX_EXPANSIONS):
+        self.kb = kb
+        self.max_expansions = max_expansions
+        self.version = None
+        self._postings = {}
+        self._doc_terms = {}
+        self._rows = {}
+        self._ids = {}
+        self._next_doc = 0
+        self._vocabulary = None
+        self._lock = threading.Lock()
+
+    # -- maintenance -------------------------------------------------------
+
+    def replace(self, rows):
+        """Index exactly ``rows`` (a full rebuild)."""
+        with self._lock:
+            self._rebuild(rows)
+
+    def _rebuild(self, rows):
+        self._postings = {}
+        self._doc_terms = {}
+        self._rows = {}
+        self._ids = {}
+        self._vocabulary = None
+        for row in rows:
+            self._upsert(row)
+
+    def _upsert(self, row):
+        biz_id = str(row["id"])
+        doc = self._ids.get(biz_id)
+        if doc is None:
+            doc = self._ids[biz_id] = self._next_doc
+            self._next_doc += 1
+        else:
+            self._unindex(doc)
+        terms = {}
+        for name, weight in FIELD_WEIGHTS:
+            for token in tokenize(_field_text(row, name)):
+                # A field counts once per word; repeating it does not help ranking.
+                terms[token] = max(terms.get(token, 0.0), weight)
+        for token, weight in terms.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary = None
+            postings[doc] = weight
+        self._doc_terms[doc] = tuple(terms)
+        self._rows[doc] = row
+
+    def _remove(self, biz_id):
+        doc = self._ids.pop(str(biz_id), None)
+        if doc is not None:
+            self._unindex(doc)
+            self._rows.pop(doc, None)
+
+    def _unindex(self, doc):
+        for token in self._doc_terms.pop(doc, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+
+    def _current(self):
+        if self.kb is None:
+            return
+        self.kb.ensure_fresh()
+        if self.kb.version == self.version:
+            return
+        with self._lock:
+            if self.kb.version == self.version:
+                return
+            version, upserts, deleted = self.kb.changes_since(self.version)
+            if upserts is None:
+                version, rows = self.kb.rows()
+                self._rebuild(rows)
+            else:
+                for biz_id in deleted:
+                    self._remove(biz_id)
+                for row in upserts:
+                    self._upsert(row)
+            self.version = version
+
+    # -- queries -----------------------------------------------------------
+
+    def _expand(self, token, prefix):
+        """``[(term, factor)]`` matching ``token``: itself, plus words it begins when ``prefix``."""
+        matches = [(token, 1.0)] if token in self._postings else []
+        if not prefix:
+            return matches
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, token)
+        expanded = 0
+        while i < len(vocabulary) and expanded < self.max_expansions:
+            term = vocabulary[i]
+            if not term.startswith(token):
+                break
+            if term != token:
+                matches.append((term, PREFIX_WEIGHT))
+                expanded += 1
+            i += 1
+        return matches
+
+    def search(self, query, mode="and", prefix=True, limit=20, categories=None):
+        """Return ``(total, [(row, score), ...])`` best first.
+
+        ``mode="and"`` needs every query word to match, ``"or"`` any of
+        them.  With ``prefix`` each word also matches longer words that
+        start with it.
+        """
+        self._current()
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return 0, []
+        with self._lock:
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                for term, factor in self._expand(token, prefix):
+                    for doc, weight in self._postings[term].items():
+                        score = weight * factor
+                        if score > token_scores.get(doc, 0.0):
+                            token_scores[doc] = score
+                if mode == "and":
+                    if scores is None:
+                        scores = token_scores
+                    else:
+                        scores = {doc: s + token_scores[doc] for doc, s in scores.items() if doc in token_scores}
+                    if not scores:
+                        return 0, []
+                else:
+                    scores = scores or {}
+                    for doc, s in token_scores.items():
+                        scores[doc] = scores.get(doc, 0.0) + s
+            rows = self._rows
+            hits = [(rows[doc], score) for doc, score in scores.items()]
+        if categories:
+            hits = [(row, score) for row, score in hits if row.get("category") in categories]
+        top = heapq.nsmallest(limit, hits, key=lambda hit: (-hit[1], hit[0].get("business_name") or ""))
+        return len(hits), top
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._rows),
+                "terms": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values()),
+                "version": self.version,
+            }
@@ -0,0 +1,278 @@
+"""
+Content-addressed storage for ``uploads/``.
+
+Every stored image is named after the SHA-256 of the bytes that were
+uploaded (or generated), in two levels of shard directories::
+
+    uploads/3f/a2/3fa2…e1.webp
+    uploads/3f/a2/3fa2…e1_w640.webp
+
+The hash is computed by streaming the upload in chunks, so a re-upload of
+a file we already have is detected without decoding or buffering it and
+just returns the existing URL.  Since a name can only ever refer to one
+content, URLs are stable and can be cached forever.
+
+``UploadIndex`` keeps size, mtime, ETag and MIME type of every file in
+memory (filled by one directory scan at startup and updated on every
+write) so serving a file needs no ``stat`` call per request.
+
+Run ``python upload_store.py --migrate`` to move files stored under the
+old ``uuid4()`` names into the store (duplicates collapse into one) and
+rewrite the URLs saved in ``businesses``; add ``--apply`` to do it.  The
+running API is told through the invalidation bus when one is configured.
+"""
+
+import argparse
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+
+from werkzeug.security import safe_join
+
+from images import InvalidImage, offload, output_extension, process_image, rendition_name
+
+
+HASH_CHUNK_BYTES = 64 * 1024
+_HASHED_NAME = re.compile(r"^(?:.*/)?([0-9a-f]{64}(?:_w\d+)?)\.\w+$")
+# Flat rendition written by the image pipeline next to a legacy master: <stem>_w<width>.<ext>
+_RENDITION_RE = re.compile(r"^(.+)_w\d+\.\w+$")
+
+
+def hash_stream(stream, chunk_size=HASH_CHUNK_BYTES) -> str:
+    """SHA-256 of a file object read in chunks; the stream is rewound afterwards."""
+    digest = hashlib.sha256()
+    start = stream.tell()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(start)
+    return digest.hexdigest()
+
+
+def atomic_write(path: Path, data: bytes):
+    """Write via a unique temp file + rename so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class FileMeta:
+    __slots__ = ("name", "path", "size", "mtime", "etag", "mimetype")
+
+    def __init__(self, name, path, size, mtime, etag, mimetype):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.etag = etag
+        self.mimetype = mimetype
+
+
+class UploadIndex:
+    """In-memory ``name -> FileMeta`` for everything under ``root``."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._files = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.misses = 0
+        self.scan()
+
+    def _meta(self, name, path, st):
+        match = _HASHED_NAME.match(name)
+        # A content-addressed name already is a strong validator; legacy files use size + mtime.
+        etag = match.group(1) if match else f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return FileMeta(name, path, st.st_size, st.st_mtime, etag, mimetype)
+
+    def scan(self):
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                try:
+                    files[name] = self._meta(name, path, os.stat(path))
+                except OSError:
+                    continue
+        with self._lock:
+            self._files = files
+
+    def add(self, name):
+        path = os.path.join(self.root, name)
+        meta = self._meta(name, path, os.stat(path))
+        with self._lock:
+            self._files[name] = meta
+        return meta
+
+    def discard(self, name):
+        """Forget ``name`` (its file is gone); the next ``get`` looks at the disk again."""
+        with self._lock:
+            self._files.pop(name, None)
+
+    def get(self, name):
+        """Return the ``FileMeta`` for ``name`` or ``None``.
+
+        Unknown names cost one ``stat`` (a file written by another worker or
+        process) and are remembered if they exist.
+        """
+        with self._lock:
+            self.lookups += 1
+            meta = self._files.get(name)
+        if meta is not None:
+            return meta
+        with self._lock:
+            self.misses += 1
+        path = safe_join(str(self.root), name)
+        if path is None or name.rsplit("/", 1)[-1].startswith(".") or not os.path.isfile(path):
+            return None
+        return self.add(name)
+
+    def __len__(self):
+        return len(self._files)
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._files), "lookups": self.lookups, "misses": self.misses}
+
+
+class UploadStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.index = UploadIndex(self.root)
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.deduplicated = 0
+
+    def name_for(self, digest: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.{output_extension()}"
+
+    def exists(self, name: str) -> bool:
+        return self.index.get(name) is not None
+
+    def write(self, name: str, data: bytes):
+        atomic_write(self.root / name, data)
+        return self.index.add(name)
+
+    def save_image(self, source, digest: str) -> str:
+        """Store ``source`` (bytes or a rewound stream) under ``digest`` unless it is already there.
+
+        Raises ``images.InvalidImage`` for anything that is not a usable image.
+        """
+        name = self.name_for(digest)
+        if self.exists(name):
+            with self._lock:
+                self.deduplicated += 1
+            return name
+        master, renditions = offload(process_image, source)
+        # Renditions first: once the master exists the upload counts as stored.
+        for width, data in renditions.items():
+            self.write(rendition_name(name, width), data)
+        self.write(name, master)
+        with self._lock:
+            self.stored += 1
+        return name
+
+    def save_upload(self, stream) -> str:
+        return self.save_image(stream, hash_stream(stream))
+
+    def save_bytes(self, data: bytes) -> str:
+        return self.save_image(data, hashlib.sha256(data).hexdigest())
+
+    def stats(self):
+        with self._lock:
+            data = {"stored": self.stored, "deduplicated": self.deduplicated}
+        data["index"] = self.index.stats()
+        return data
+
+
+def migrate_legacy(store: UploadStore, apply=False, delete=False):
+    """Move flat ``uuid4()`` files into the store and repoint ``businesses`` URLs.
+
+    Returns ``{old_name: new_name}``.  Without ``apply`` nothing is written.
+    Flat renditions (``<stem>_w<width>.<ext>``) are not migrated, the store
+    makes its own; with ``delete`` they go away with their master.
+    """
+    mapping = {}
+    renditions = {}  # master stem -> flat rendition paths
+    for path in sorted(store.root.iterdir()):  # only the flat, pre-store files
+        if not path.is_file() or path.name.startswith("."):
+            continue
+        match = _RENDITION_RE.match(path.name)
+        if match:
+            renditions.setdefault(match.group(1), []).append(path)
+            continue
+        with open(path, "rb") as fh:
+            digest = hash_stream(fh)
+            if not apply:
+                mapping[path.name] = store.name_for(digest)
+                continue
+            try:
+                mapping[path.name] = store.save_image(fh, digest)
+            except InvalidImage as e:
+                print(f"Skipping {path.name}: {e}")
+
+    if apply and mapping:
+        from db import get_conn
+
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                for old, new in mapping.items():
+                    for column in ("logo_url", "background_url"):
+                        cur.execute(
+                            f"UPDATE businesses SET {column} = REPLACE({column}, %s, %s) WHERE {column} LIKE %s",
+                            (f"/uploads/{old}", f"/uploads/{new}", f"%/uploads/{old}"),
+                        )
+        if delete:
+            for old in mapping:
+                (store.root / old).unlink(missing_ok=True)
+                for rendition in renditions.get(old.rsplit(".", 1)[0], ()):
+                    rendition.unlink(missing_ok=True)
+    return mapping
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed upload store.")
+    parser.add_argument("--migrate", action="store_true", help="Move legacy uploads into the store")
+    parser.add_argument("--apply", action="store_true", help="Write files and update the DB (default: dry run)")
+    parser.add_argument("--delete", action="store_true", help="Remove the legacy files after --apply")
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parent / "uploads"))
+    args = parser.parse_args()
+
+    if not args.migrate:
+        parser.print_help()
+        return
+    mapping = migrate_legacy(UploadStore(Path(args.root)), apply=args.apply, delete=args.apply and args.delete)
+    by_target = {}
+    for old, new in mapping.items():
+        by_target.setdefault(new, []).append(old)
+    for new, olds in sorted(by_target.items()):
+        print(f"{new} <- {', '.join(olds)}")
+    print(f"{len(mapping)} files -> {len(by_target)} stored objects" + ("" if args.apply else " (dry run)"))
+    if args.apply and mapping:
+        announce_businesses_changed()
+
+
+def announce_businesses_changed():
+    """Tell running API workers that ``businesses`` URLs changed (needs the invalidation bus)."""
+    from invalidation import InvalidationBus
+
+    bus = InvalidationBus(os.getenv("INVALIDATION_URL") or os.getenv("SOCKETIO_MESSAGE_QUEUE"))
+    if bus.url is None:
+        print("No INVALIDATION_URL/SOCKETIO_MESSAGE_QUEUE: the API picks up the new URLs within "
+              "RESPONSE_CACHE_TTL and KB_REFRESH_INTERVAL; restart it to see them at once.")
+        return
+    bus.start()
+    bus.publish("businesses")
+    print("Published a businesses invalidation to the API workers.")
+
+
+if __name__ == "__main__":
+    main()
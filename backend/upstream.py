@@ -0,0 +1,228 @@
+"""
+Guard rails for calls to slow third-party services (OpenAI, noembed).
+
+The API runs as a single ``gunicorn -k eventlet`` worker, so every socket
+shares one hub.  The HTTP clients themselves are green once the worker has
+monkey-patched ``socket``; what this module adds is the policy around them:
+
+* ``Upstream`` caps how many calls to a service may be in flight at once
+  (extra callers wait a short while, then give up) and owns a
+  ``CircuitBreaker`` so that, after a run of failures, callers fail fast
+  with ``CircuitOpen`` and use their fallback instead of queueing behind a
+  degraded service.
+* ``RateLimiter`` hands out one ``TokenBucket`` per key (socket session id,
+  client IP) to stop a single client from monopolising the upstream.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "8"))
+UPSTREAM_QUEUE_TIMEOUT = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", "2"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+
+class UpstreamUnavailable(Exception):
+    """Base class: the call was not attempted; use the fallback."""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Raised while the breaker is open after repeated upstream failures."""
+
+
+class UpstreamBusy(UpstreamUnavailable):
+    """Raised when no concurrency slot frees up within the queue timeout."""
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def take(self, now=None, cost=1.0):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+
+class RateLimiter:
+    """Token bucket per key: ``per_minute`` sustained, up to ``burst`` at once."""
+
+    def __init__(self, per_minute, burst, max_keys=10000):
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def allow(self, key) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if bucket.take(now):
+                self.allowed += 1
+                return True
+            self.limited += 1
+            return False
+
+    def forget(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def _prune(self, now):
+        # A bucket that has refilled completely carries no state worth keeping.
+        full_after = self.burst / self.rate if self.rate else float("inf")
+        for key in [k for k, b in self._buckets.items() if now - b.updated_at >= full_after]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            oldest = sorted(self._buckets, key=lambda k: self._buckets[k].updated_at)
+            for key in oldest[: len(oldest) // 2]:
+                del self._buckets[key]
+
+    def stats(self):
+        with self._lock:
+            return {"keys": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` one trial call is let through (half-open); its
+    outcome closes the breaker again or re-opens it for another period.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_running = False
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def cancel_trial(self):
+        """The admitted call never reached the service; let the next one try instead."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+
+class Upstream:
+    """Concurrency cap + circuit breaker around one external service.
+
+    ``is_failure(exc)`` decides whether an exception says something about
+    the service's health (timeouts, 5xx) or only about the request (a 400
+    for a bad prompt), which should not open the breaker.
+    """
+
+    def __init__(self, name, max_concurrency=UPSTREAM_MAX_CONCURRENCY, queue_timeout=UPSTREAM_QUEUE_TIMEOUT,
+                 breaker=None, is_failure=None):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.is_failure = is_failure or (lambda exc: True)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold a concurrency slot for the whole ``with`` block (e.g. a stream)."""
+        if not self.breaker.allow():
+            with self._lock:
+                self.rejected += 1
+            raise CircuitOpen(f"{self.name} is unavailable (circuit open)")
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.breaker.cancel_trial()
+            with self._lock:
+                self.rejected += 1
+            raise UpstreamBusy(f"{self.name} is busy ({self.max_concurrency} calls in flight)")
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            if self.is_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def call(self, fn, *args, **kwargs):
+        with self.slot():
+            return fn(*args, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            data = {
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+                "calls": self.calls,
+                "errors": self.errors,
+                "rejected": self.rejected,
+            }
+        data["breaker"] = self.breaker.stats()
+        return data
@@ -0,0 +1,286 @@
+"""
+Schema-driven sanitisation and validation of business listings.
+
+Every pattern is compiled once at import time and each text field is
+cleaned in a single ``re.sub`` pass (HTML tags and disallowed characters
+are removed by the same expression).  ``Schema.clean`` checks every field
+and returns all errors at once; ``Schema.clean_many`` does the same for a
+stream of records and is what ``POST /admin/businesses/bulk`` uses, while
+``PUT /admin/businesses/<id>`` cleans a partial record with the same rules.
+
+Run ``python validation.py --bench`` for the per-record cost.
+"""
+
+import argparse
+import json
+import re
+import time
+
+
+ALLOWED_DISCOUNTS = {"N/A", "5%", "10%", "15%", "20%", "25%", "30%", "40%", "50%"}
+ALLOWED_STATUSES = {"pending", "approved", "rejected"}
+
+_HTML_TAG = re.compile(r"<[^>]*>")
+# Tags first, then anything outside the allowed set; same result as stripping
+# the tags and filtering the characters in two passes.
+_SANITIZE = re.compile(r"""<[^>]*>|[^\w\s.,;:!?'"()-]""")
+EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
+PHONE_RE = re.compile(r"^[0-9+()\s-]{7,20}$")
+WEBSITE_RE = re.compile(r"^https?://")
+MISSING = "Missing"
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def strip_html(text) -> str:
+    return _HTML_TAG.sub("", _text(text))
+
+
+def sanitize_text(text, max_len: int = 255) -> str:
+    return _SANITIZE.sub("", _text(text)).strip()[:max_len]
+
+
+# Cleaners: raw value -> stored value.  Checks: stored value -> error or None.
+
+def text(max_len):
+    return lambda value: sanitize_text(value, max_len)
+
+
+def plain(value):
+    return strip_html(value).strip()
+
+
+def optional_plain(value):
+    return strip_html(value).strip() or None
+
+
+def email(value):
+    return strip_html(value).replace(" ", "").lower()
+
+
+def flag(value):
+    return bool(value)
+
+
+def lower(value):
+    return _text(value).strip().lower() or None
+
+
+def tags(max_len):
+    def clean(value):
+        if value is None:
+            return None
+        if not isinstance(value, list):
+            raise ValueError("tags must be an array")
+        cleaned = [sanitize_text(tag, max_len) for tag in value]
+        cleaned = [tag for tag in cleaned if tag]
+        return json.dumps(cleaned) if cleaned else None
+    return clean
+
+
+def matches(pattern, message):
+    return lambda value: None if pattern.match(value) else message
+
+
+def one_of(allowed, message):
+    return lambda value: None if value in allowed else message
+
+
+class Field:
+    """``blank`` is what a partial update stores for a field sent empty.
+
+    Fields with a ``default`` are not nullable: a partial update cannot
+    blank them and gets the field's check error instead.
+    """
+
+    __slots__ = ("name", "clean", "check", "required", "default", "blank", "aliases")
+
+    def __init__(self, name, clean=plain, check=None, required=False, default=None, blank=None, aliases=()):
+        self.name = name
+        self.clean = clean
+        self.check = check
+        self.required = required
+        self.default = default
+        self.blank = blank
+        self.aliases = aliases
+
+
+class Schema:
+    """An ordered set of ``Field``s.
+
+    ``clean(data)`` returns ``(values, errors)``: ``values`` has every field
+    (defaults for absent ones) and ``errors`` maps field name to message.
+    With ``partial=True`` only the fields present in ``data`` are cleaned
+    and nothing is required, for updates; defaults are never applied there,
+    a field sent empty is stored as its ``blank`` value.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.names = tuple(f.name for f in self.fields)
+        self.required = tuple(f.name for f in self.fields if f.required)
+
+    def _raw(self, data, field):
+        """``(present, value)``; with aliases the first non-empty one wins."""
+        if not field.aliases:
+            return (True, data[field.name]) if field.name in data else (False, None)
+        keys = [key for key in (field.name, *field.aliases) if key in data]
+        for key in keys:
+            if data[key]:
+                return True, data[key]
+        return (True, data[keys[0]]) if keys else (False, None)
+
+    def clean(self, data, partial=False, only=None):
+        values = {}
+        errors = {}
+        for field in self.fields:
+            if only is not None and field.name not in only:
+                continue
+            present, raw = self._raw(data, field)
+            if not present and partial:
+                continue
+            if field.required and not partial and not raw:
+                errors[field.name] = MISSING
+                continue
+            if not present:
+                values[field.name] = field.default
+                continue
+            try:
+                value = field.clean(raw)
+            except ValueError as e:
+                errors[field.name] = str(e)
+                continue
+            if value is None:
+                if not partial:
+                    values[field.name] = field.default
+                elif field.default is not None:
+                    errors[field.name] = (field.check and field.check("")) or MISSING
+                else:
+                    values[field.name] = field.blank
+                continue
+            if field.check is not None:
+                error = field.check(value)
+                if error:
+                    errors[field.name] = error
+                    continue
+            values[field.name] = value
+        return values, errors
+
+    def clean_many(self, records, partial=False, only=None):
+        """Yield ``(key, values, errors)`` for each ``(key, data)`` in ``records``.
+
+        ``data`` may already be an error message (e.g. a line that is not
+        valid JSON); it is passed through as ``{"_record": message}``.
+        """
+        clean = self.clean
+        for key, data in records:
+            if isinstance(data, str):
+                yield key, None, {"_record": data}
+                continue
+            values, errors = clean(data, partial=partial, only=only)
+            yield key, values, errors
+
+
+def error_message(errors) -> str:
+    """One string for ``errors``; missing fields first, like the old single-error messages."""
+    missing = [name for name, error in errors.items() if error == MISSING]
+    parts = [f"Missing fields: {', '.join(missing)}"] if missing else []
+    parts.extend(error for error in errors.values() if error != MISSING)
+    return "; ".join(parts)
+
+
+BUSINESS_SCHEMA = Schema([
+    Field("surname", text(120), required=True),
+    Field("email", email, matches(EMAIL_RE, "Invalid email format"), required=True),
+    Field("show_email", flag, default=False),
+    Field("phone", strip_html, matches(PHONE_RE, "Invalid phone format"), required=True),
+    Field("show_phone", flag, default=False),
+    Field("business_name", text(160), required=True),
+    Field("category", text(120), required=True),
+    Field("discount", _text, one_of(ALLOWED_DISCOUNTS, "Invalid discount option"), required=True),
+    Field("description", text(500), required=True),
+    Field("website", optional_plain, matches(WEBSITE_RE, "Website must start with http:// or https://"), blank=""),
+    Field("logo_url", optional_plain, blank=""),
+    Field("background_url", optional_plain, blank="", aliases=("cover_url",)),
+    Field("tags", tags(40), blank="[]"),
+    Field("status", lower,
+          one_of(ALLOWED_STATUSES, f"status must be one of: {', '.join(sorted(ALLOWED_STATUSES))}"),
+          default="pending"),
+])
+
+
+def _sample_record(i):
+    return {
+        "surname": f"<b>Perez</b> {i}",
+        "email": f" Owner{i}@Example.com ",
+        "phone": "+52 (55) 1234-5678",
+        "show_email": True,
+        "business_name": f"Cafe <i>Central</i> #{i}",
+        "category": "Food & Beverage",
+        "discount": "10%",
+        "description": "Cafe de especialidad <script>x</script> con pan artesanal; abierto diario. " * 3,
+        "website": "https://example.com",
+        "tags": ["cafe", "<b>pan</b>", "desayunos", "wifi", ""],
+    }
+
+
+def _inline_clean(data):
+    """The per-request code this module replaced, kept only as the benchmark baseline."""
+    def strip(text):
+        return re.sub(r"<[^>]*>", "", text or "")
+
+    def sanitize(text, max_len):
+        return re.sub(r'[^\w\s.,;:!?\'"()-]', "", strip(text), flags=re.UNICODE).strip()[:max_len]
+
+    values = {
+        "surname": sanitize(data.get("surname"), 120),
+        "business_name": sanitize(data.get("business_name"), 160),
+        "category": sanitize(data.get("category"), 120),
+        "description": sanitize(data.get("description"), 500),
+        "website": strip(data.get("website", "")).strip(),
+        "email": strip(data.get("email", "")).replace(" ", "").lower(),
+        "phone": strip(data.get("phone", "")),
+        "tags": [sanitize(str(t), 40) for t in data.get("tags", []) if sanitize(str(t), 40)],
+    }
+    re.match(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$", values["email"])
+    re.match(r"^[0-9+()\s-]{7,20}$", values["phone"])
+    re.match(r"^https?://", values["website"])
+    return values
+
+
+def bench(records=20000):
+    """Print the per-record cost of the schema against the old inline cleaning."""
+    data = [_sample_record(i) for i in range(1000)]
+    rounds = max(1, records // len(data))
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        elapsed = time.perf_counter() - start
+        per_record = elapsed / (rounds * len(data)) * 1e6
+        print(f"{label:<22} {per_record:8.2f} us/record")
+
+    timed("inline (before)", lambda: [_inline_clean(d) for d in data])
+    timed("clean", lambda: [BUSINESS_SCHEMA.clean(d) for d in data])
+    timed("clean_many", lambda: list(BUSINESS_SCHEMA.clean_many(enumerate(data))))
+    timed("clean(partial)", lambda: [BUSINESS_SCHEMA.clean(d, partial=True, only={"email", "tags"}) for d in data])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Business listing validation.")
+    parser.add_argument("--bench", action="store_true", help="Measure the per-record validation cost")
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+    bench(args.records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+oEmbed metadata (title, thumbnail) for the videos of the academy.
+
+The metadata is fetched once when a video is added and stored in the
+``videos`` row, so ``GET /videos`` answers from the DB alone.  Rows that
+are still missing it (added before this existed, or whose fetch failed)
+are handed to ``VideoMetaFetcher.backfill``, which fetches them in the
+background on a small fixed pool of threads, each call going through the
+``oembed`` upstream (timeout, concurrency cap, circuit breaker).  A URL
+that fails is not retried until ``VIDEO_META_NEGATIVE_TTL`` has passed,
+so a broken link costs one outbound call per period, not one per page
+view.
+
+``OEMBED_URL`` points at noembed.com by default; ``fake_oembed.py``
+serves the same API locally for tests.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from upstream import UpstreamUnavailable
+
+
+OEMBED_URL = os.getenv("OEMBED_URL", "https://noembed.com/embed")
+OEMBED_TIMEOUT = float(os.getenv("OEMBED_TIMEOUT", "5"))
+VIDEO_META_WORKERS = int(os.getenv("VIDEO_META_WORKERS", "4"))
+VIDEO_META_NEGATIVE_TTL = float(os.getenv("VIDEO_META_NEGATIVE_TTL", "600"))
+
+
+def fetch_oembed(url, upstream=None, endpoint=None, timeout=None):
+    """Return ``{"title", "thumbnail_url"}`` for ``url`` or ``None`` if it could not be resolved.
+
+    Transport errors propagate (``upstream`` counts them towards its breaker);
+    an answer without a title (noembed replies 200 with ``{"error": ...}``
+    for unsupported links) returns ``None``.
+    """
+    params = {"url": url}
+    timeout = OEMBED_TIMEOUT if timeout is None else timeout
+    endpoint = endpoint or OEMBED_URL
+    if upstream is not None:
+        res = upstream.call(requests.get, endpoint, params=params, timeout=timeout)
+    else:
+        res = requests.get(endpoint, params=params, timeout=timeout)
+    if res.status_code != 200:
+        if res.status_code >= 500:
+            res.raise_for_status()
+        return None
+    data = res.json()
+    title = (data.get("title") or "").strip()
+    if data.get("error") or not title:
+        return None
+    return {"title": title[:255], "thumbnail_url": (data.get("thumbnail_url") or None)}
+
+
+class VideoMetaFetcher:
+    """Bounded background fetcher with a negative cache.
+
+    ``save(video_id, meta)`` is called from a worker thread for every
+    successful fetch, followed by ``on_done()``.
+    """
+
+    def __init__(self, save, upstream=None, workers=VIDEO_META_WORKERS,
+                 negative_ttl=VIDEO_META_NEGATIVE_TTL, on_done=None):
+        self.save = save
+        self.upstream = upstream
+        self.negative_ttl = negative_ttl
+        self.on_done = on_done
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="video-meta")
+        self._lock = threading.Lock()
+        self._failed = {}  # url -> monotonic time after which it may be retried
+        self._in_flight = set()
+        self.fetched = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def fetch(self, url):
+        """Fetch now (used by ``POST /videos``); ``None`` on failure or while negatively cached."""
+        if self._suppressed(url):
+            with self._lock:
+                self.skipped += 1
+            return None
+        try:
+            meta = fetch_oembed(url, self.upstream)
+        except UpstreamUnavailable:
+            # The breaker/slots speak for the service, not for this URL: retry on the next backfill.
+            with self._lock:
+                self.skipped += 1
+            return None
+        except Exception as e:
+            print(f"OEmbed Error: {e}")
+            meta = None
+        with self._lock:
+            if meta is None:
+                self.failed += 1
+                self._failed[url] = time.monotonic() + self.negative_ttl
+            else:
+                self.fetched += 1
+                self._failed.pop(url, None)
+        return meta
+
+    def _suppressed(self, url):
+        with self._lock:
+            retry_at = self._failed.get(url)
+            if retry_at is None:
+                return False
+            if time.monotonic() >= retry_at:
+                del self._failed[url]
+                return False
+            return True
+
+    def backfill(self, rows):
+        """Schedule ``rows`` (dicts with ``id`` and ``url``) and return how many were queued.
+
+        Rows already being fetched or negatively cached are skipped, so
+        calling this on every page load is cheap.
+        """
+        todo = []
+        for row in rows:
+            url = row.get("url")
+            if not url or self._suppressed(url):
+                continue
+            with self._lock:
+                if row["id"] in self._in_flight:
+                    continue
+                self._in_flight.add(row["id"])
+            todo.append((row["id"], url))
+        for video_id, url in todo:
+            self._pool.submit(self._fill, video_id, url)
+        return len(todo)
+
+    def _fill(self, video_id, url):
+        saved = False
+        try:
+            meta = self.fetch(url)
+            if meta is not None:
+                self.save(video_id, meta)
+                saved = True
+        except Exception as e:
+            print(f"Video Meta Save Error: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(video_id)
+        if saved and self.on_done is not None:
+            self.on_done()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "fetched": self.fetched,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "negative_cached": len(self._failed),
+                "in_flight": len(self._in_flight),
+            }
@@ -0,0 +1,7 @@
+-- Indices para bases ya creadas con una version anterior de schema.sql.
+-- Soportan la paginacion por cursor de GET /businesses y el refresco incremental del chat.
+ALTER TABLE businesses
+    ADD INDEX idx_businesses_created (created_at, id),
+    ADD INDEX idx_businesses_category_created (category, created_at, id),
+    ADD INDEX idx_businesses_status_created (status, created_at, id),
+    ADD INDEX idx_businesses_updated (updated_at);
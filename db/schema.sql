@@ -16,5 +16,9 @@ CREATE TABLE businesses (
     tags TEXT,
     status VARCHAR(50) DEFAULT 'pending',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_businesses_created (created_at, id),
+    INDEX idx_businesses_category_created (category, created_at, id),
+    INDEX idx_businesses_status_created (status, created_at, id),
+    INDEX idx_businesses_updated (updated_at)
 );
\ No newline at end of file
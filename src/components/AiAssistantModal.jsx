@@ -11,6 +11,7 @@ const AiAssistantModal = ({ isOpen, onClose }) => {
   ]);
   const [inputText, setInputText] = useState('');
   const [isTyping, setIsTyping] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const [socket, setSocket] = useState(null);
   const messagesEndRef = useRef(null);
   const tRef = useRef(t);
@@ -37,14 +38,29 @@ const AiAssistantModal = ({ isOpen, onClose }) => {
         newSocket = io(SOCKET_URL);
         setSocket(newSocket);
 
-        newSocket.on('chat_response', (data) => {
-            const aiMessage = { 
-                id: Date.now(), 
-                sender: 'ai', 
-                text: data.message || tRef.current('ai.fallback'),
-            };
-            setMessages(prev => [...prev, aiMessage]);
+        // The reply arrives as chunks; the first one replaces the typing indicator.
+        newSocket.on('chat_response_chunk', (data) => {
             setIsTyping(false);
+            setMessages(prev => {
+                const last = prev[prev.length - 1];
+                if (last && last.streamId === data.message_id) {
+                    return [...prev.slice(0, -1), { ...last, text: last.text + data.delta }];
+                }
+                return [...prev, { id: Date.now(), sender: 'ai', streamId: data.message_id, text: data.delta, streaming: true }];
+            });
+        });
+
+        newSocket.on('chat_response_done', (data) => {
+            setMessages(prev => {
+                const last = prev[prev.length - 1];
+                const text = data.message || tRef.current('ai.fallback');
+                if (last && last.streamId === data.message_id) {
+                    return [...prev.slice(0, -1), { ...last, text, streaming: false }];
+                }
+                return [...prev, { id: Date.now(), sender: 'ai', streamId: data.message_id, text }];
+            });
+            setIsTyping(false);
+            setIsStreaming(false);
         });
     } else {
         document.body.style.overflow = 'unset';
@@ -64,6 +80,7 @@ const AiAssistantModal = ({ isOpen, onClose }) => {
     setMessages(prev => [...prev, userMessage]);
     setInputText('');
     setIsTyping(true);
+    setIsStreaming(true);
 
     // Emit to Backend
     socket.emit('chat_message', { message: inputText });
@@ -147,7 +164,7 @@ const AiAssistantModal = ({ isOpen, onClose }) => {
                 </div>
                 <button 
                     type="submit"
-                    disabled={!inputText.trim() || isTyping || !socket}
+                    disabled={!inputText.trim() || isTyping || isStreaming || !socket}
                     className="p-3 bg-indigo-600 text-white rounded-xl hover:bg-indigo-700 disabled:opacity-50 disabled:cursor-not-allowed transition-all shadow-md active:scale-95"
                 >
                     <svg className="h-5 w-5" fill="none" viewBox="0 0 24 24" stroke="currentColor">
@@ -1,4 +1,5 @@
 import React from 'react';
+import { sizedImageUrl } from '../config';
 import { useLanguage } from '../i18n/context.js';
 
 const ListingCard = ({ title, category, subCategory, description, imageUrl, logoUrl, delay, icon, isPrimary, onContact }) => {
@@ -6,13 +7,13 @@ const ListingCard = ({ title, category, subCategory, description, imageUrl, logo
   return (
     <div className={`group bg-white rounded-2xl overflow-hidden border border-slate-200 shadow-sm hover:shadow-xl hover:border-welfare-blue/30 transition-all duration-300 hover:-translate-y-1 relative opacity-0 animate-fade-in-up ${delay}`}>
       <div className="h-40 bg-slate-200 relative overflow-hidden">
-        <img src={imageUrl} alt={title} className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-700" />
+        <img src={sizedImageUrl(imageUrl, 640)} alt={title} className="w-full h-full object-cover group-hover:scale-105 transition-transform duration-700" />
         <div className="absolute inset-0 bg-gradient-to-t from-slate-900/10 to-transparent"></div>
       </div>
       <div className="absolute top-28 left-5 p-1 bg-white rounded-full shadow-md z-10">
 	        <div className="h-14 w-14 rounded-full bg-white flex items-center justify-center border border-slate-100 overflow-hidden">
 	           {logoUrl ? (
-	             <img src={logoUrl} alt={`${title} logo`} className="h-full w-full object-contain rounded-full p-2" />
+	             <img src={sizedImageUrl(logoUrl, 200)} alt={`${title} logo`} className="h-full w-full object-contain rounded-full p-2" />
 	           ) : (
 	             icon
 	           )}
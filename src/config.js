@@ -1,2 +1,7 @@
 export const API_BASE = import.meta.env.VITE_API_URL || 'http://localhost:5001';
-export const SOCKET_URL = import.meta.env.VITE_SOCKET_URL || 'http://localhost:5001';
\ No newline at end of file
+export const SOCKET_URL = import.meta.env.VITE_SOCKET_URL || 'http://localhost:5001';
+// Uploaded images are also stored in narrower renditions, picked with `?w=`.
+export const sizedImageUrl = (url, width) => {
+  if (!url || !url.includes('/uploads/')) return url;
+  return `${url}${url.includes('?') ? '&' : '?'}w=${width}`;
+};
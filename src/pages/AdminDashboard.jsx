@@ -48,46 +48,73 @@ const AdminDashboard = () => {
   const [isSidebarOpen, setIsSidebarOpen] = useState(false);
   const [selectedCategories, setSelectedCategories] = useState([]);
   const [searchQuery, setSearchQuery] = useState("");
+  const [statusFilter, setStatusFilter] = useState("");
   const [currentPage, setCurrentPage] = useState(1);
 
+  const itemsPerPage = 6;
+  const pageSize = itemsPerPage * 4;
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isFetchingMore, setIsFetchingMore] = useState(false);
+  const [debouncedQuery, setDebouncedQuery] = useState("");
+
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  const normalizeListings = (data) => (data || []).map((item) => ({
+    id: item.id,
+    title: item.business_name || 'Untitled',
+    category: item.category || 'Other',
+    subCategory: item.subCategory,
+    description: item.description || '',
+    imageUrl: item.background_url || 'https://images.unsplash.com/photo-1498050108023-c5249f4df085?auto=format&fit=crop&w=1200&q=80',
+    logoUrl: item.logo_url || null,
+    delay: '',
+    surname: item.surname || '',
+    email: item.email,
+    show_email: item.show_email,
+    phone: item.phone,
+    show_phone: item.show_phone,
+    website: item.website,
+    discount: item.discount,
+    status: item.status,
+    tags: Array.isArray(item.tags) ? item.tags : [],
+    raw: item // Keep raw data for editing
+  }));
+
+  // The server returns the moderation queue (pending first) one keyset page at a time.
+  const fetchPage = async (cursor) => {
+    const params = new URLSearchParams({ limit: String(pageSize) });
+    selectedCategories.forEach(c => params.append('category', c));
+    if (statusFilter) params.set('status', statusFilter);
+    if (debouncedQuery) params.set('q', debouncedQuery);
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${API_BASE}/admin/businesses?${params.toString()}`);
+    if (!res.ok) throw new Error('Failed to fetch');
+    const data = await res.json();
+    return { items: normalizeListings(data.items), nextCursor: data.next_cursor || null };
+  };
+
   useEffect(() => {
+    let cancelled = false;
     const fetchListings = async () => {
       try {
-        const res = await fetch(`${API_BASE}/admin/businesses`);
-        if (!res.ok) throw new Error('Failed to fetch');
-        const data = await res.json();
-        
-        const normalized = data.map((item) => ({
-          id: item.id,
-          title: item.business_name || 'Untitled',
-          category: item.category || 'Other',
-          subCategory: item.subCategory,
-          description: item.description || '',
-          imageUrl: item.background_url || 'https://images.unsplash.com/photo-1498050108023-c5249f4df085?auto=format&fit=crop&w=1200&q=80',
-          logoUrl: item.logo_url || null,
-          delay: '',
-          surname: item.surname || '',
-          email: item.email,
-          show_email: item.show_email,
-          phone: item.phone,
-          show_phone: item.show_phone,
-          website: item.website,
-          discount: item.discount,
-          status: item.status,
-          tags: Array.isArray(item.tags) ? item.tags : [],
-          raw: item // Keep raw data for editing
-        }));
-        
-        setListings(normalized);
+        const { items, nextCursor: cursor } = await fetchPage(null);
+        if (cancelled) return;
+        setListings(items);
+        setNextCursor(cursor);
       } catch (err) {
         console.error(err);
       } finally {
-        setIsLoading(false);
+        if (!cancelled) setIsLoading(false);
       }
     };
 
     fetchListings();
-  }, [refreshTrigger]);
+    return () => { cancelled = true; };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [refreshTrigger, selectedCategories, statusFilter, debouncedQuery]);
 
   const handleDelete = async (id) => {
     if (!window.confirm('Are you sure you want to delete this business? This action cannot be undone.')) return;
@@ -127,23 +154,27 @@ const AdminDashboard = () => {
   // Reset page when filters change
   useEffect(() => {
     setCurrentPage(1);
-  }, [selectedCategories, searchQuery]);
+  }, [selectedCategories, statusFilter, debouncedQuery]);
 
-  // Filter Logic
-  const filteredListings = listings.filter(item => {
-    const matchesCategory = selectedCategories.length === 0 || selectedCategories.includes(item.category);
-    const matchesSearch = searchQuery === "" || 
-        item.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        item.description.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        item.category.toLowerCase().includes(searchQuery.toLowerCase());
-        
-    return matchesCategory && matchesSearch;
-  });
+  const loadedPages = Math.ceil(listings.length / itemsPerPage);
 
-  // Pagination Logic
-  const itemsPerPage = 6;
-  const totalPages = Math.max(1, Math.ceil(filteredListings.length / itemsPerPage));
-  const currentListings = filteredListings.slice(
+  // Fetch the next keyset page when the user reaches the end of what is loaded.
+  useEffect(() => {
+    if (currentPage <= loadedPages || !nextCursor || isFetchingMore) return;
+    setIsFetchingMore(true);
+    fetchPage(nextCursor)
+      .then(({ items, nextCursor: cursor }) => {
+        setListings(prev => [...prev, ...items]);
+        setNextCursor(cursor);
+      })
+      .catch(() => setNextCursor(null))
+      .finally(() => setIsFetchingMore(false));
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [currentPage, loadedPages, nextCursor]);
+
+  // Pagination Logic: one extra page is offered while the server has more.
+  const totalPages = Math.max(1, loadedPages + (nextCursor ? 1 : 0));
+  const currentListings = listings.slice(
     (currentPage - 1) * itemsPerPage,
     currentPage * itemsPerPage
   );
@@ -193,17 +224,29 @@ const AdminDashboard = () => {
                 </div>
                 <div className="hidden md:block">
                      <h1 className="text-2xl font-bold text-slate-900">Admin Dashboard</h1>
-                     <p className="text-slate-500 text-sm">Manage {listings.length} registered businesses</p>
+                     <p className="text-slate-500 text-sm">Manage {listings.length}{nextCursor ? '+' : ''} registered businesses</p>
                 </div>
               </div>
               
-              <button 
+              <div className="flex items-center gap-2">
+                <select
+                    value={statusFilter}
+                    onChange={(e) => setStatusFilter(e.target.value)}
+                    className="px-3 py-2 bg-white border border-slate-300 rounded-lg shadow-sm text-sm text-slate-700"
+                >
+                    <option value="">All statuses</option>
+                    <option value="pending">Pending</option>
+                    <option value="approved">Approved</option>
+                    <option value="rejected">Rejected</option>
+                </select>
+                <button 
                     onClick={() => setRefreshTrigger(prev => prev + 1)}
                     className="px-4 py-2 bg-white border border-slate-300 rounded-lg shadow-sm text-slate-700 hover:bg-slate-50 flex items-center gap-2"
                 >
                     <svg className="w-4 h-4" fill="none" viewBox="0 0 24 24" stroke="currentColor"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M4 4v5h.582m15.356 2A8.001 8.001 0 004.582 9m0 0H9m11 11v-5h-.581m0 0a8.003 8.003 0 01-15.357-2m15.357 2H15" /></svg>
                     Refresh
                 </button>
+              </div>
             </div>
 
             {/* Scrollable Grid Area */}
@@ -259,7 +302,7 @@ const AdminDashboard = () => {
                         <h3 className="text-lg font-medium text-slate-900">No matching businesses</h3>
                         <p className="mt-1">Try adjusting your filters or search.</p>
                         <button 
-                          onClick={() => { setSelectedCategories([]); setSearchQuery(""); }}
+                          onClick={() => { setSelectedCategories([]); setSearchQuery(""); setStatusFilter(""); }}
                           className="mt-4 text-welfare-blue hover:underline font-medium"
                         >
                           Clear Filters
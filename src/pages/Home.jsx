@@ -53,34 +53,67 @@ function Home() {
   const [selectedCategories, setSelectedCategories] = useState([]);
   const [searchQuery, setSearchQuery] = useState("");
 
+  const itemsPerPage = 6;
+  const pageSize = itemsPerPage * 4;
+  const [nextCursor, setNextCursor] = useState(null);
+  const [isFetchingMore, setIsFetchingMore] = useState(false);
+  const [debouncedQuery, setDebouncedQuery] = useState("");
+
   useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  const normalizeListings = (data) => (data || []).map((item, idx) => ({
+    id: item.id || idx,
+    title: item.business_name || item.title || 'Untitled',
+    category: item.category || 'Other',
+    subCategory: item.subCategory,
+    description: item.description || '',
+    imageUrl: item.background_url || 'https://images.unsplash.com/photo-1498050108023-c5249f4df085?auto=format&fit=crop&w=1200&q=80',
+    logoUrl: item.logo_url || null,
+    delay: '',
+    surname: item.surname || '',
+    email: item.show_email ? item.email : undefined,
+    phone: item.show_phone ? item.phone : undefined,
+    website: item.website || undefined,
+    discount: item.discount,
+    tags: Array.isArray(item.tags)
+      ? item.tags
+      : (typeof item.tags === 'string' ? (() => {
+          try { return JSON.parse(item.tags); } catch { return []; }
+        })() : []),
+  }));
+
+  // Filters and search run on the server; each request returns one keyset page.
+  // A search query goes to the in-memory index instead and returns the best matches at once.
+  const fetchPage = async (cursor) => {
+    const params = new URLSearchParams({ limit: String(debouncedQuery ? 200 : pageSize) });
+    selectedCategories.forEach(c => params.append('category', c));
+    if (debouncedQuery) params.set('q', debouncedQuery);
+    if (cursor) params.set('cursor', cursor);
+    const path = debouncedQuery ? 'businesses/search' : 'businesses';
+    const res = await fetch(`${API_BASE}/${path}?${params.toString()}`);
+    if (!res.ok) {
+      throw new Error('Failed to fetch listings');
+    }
+    const data = await res.json();
+    return { items: normalizeListings(data.items), nextCursor: data.next_cursor || null };
+  };
+
+  useEffect(() => {
+    let cancelled = false;
     const fetchListings = async () => {
       try {
-        const res = await fetch(`${API_BASE}/businesses?limit=200`);
-        if (!res.ok) {
-          throw new Error('Failed to fetch listings');
+        const { items: normalized, nextCursor: cursor } = await fetchPage(null);
+        if (cancelled) return;
+        if (debouncedQuery) {
+          // Search results arrive ranked by relevance; keep that order.
+          setListings(normalized);
+          setNextCursor(cursor);
+          setError('');
+          return;
         }
-        const data = await res.json();
-        const normalized = (data || []).map((item, idx) => ({
-          id: item.id || idx,
-          title: item.business_name || item.title || 'Untitled',
-          category: item.category || 'Other',
-          subCategory: item.subCategory,
-          description: item.description || '',
-          imageUrl: item.background_url || 'https://images.unsplash.com/photo-1498050108023-c5249f4df085?auto=format&fit=crop&w=1200&q=80',
-          logoUrl: item.logo_url || null,
-          delay: '',
-          surname: item.surname || '',
-          email: item.show_email ? item.email : undefined,
-          phone: item.show_phone ? item.phone : undefined,
-          website: item.website || undefined,
-          discount: item.discount,
-          tags: Array.isArray(item.tags)
-            ? item.tags
-            : (typeof item.tags === 'string' ? (() => {
-                try { return JSON.parse(item.tags); } catch { return []; }
-              })() : []),
-        }));
         const masters = [];
         const others = [];
         normalized.forEach(item => {
@@ -103,21 +136,43 @@ function Home() {
         result.push(...remainingMasters);
         result.push(...shuffledOthers);
         setListings(result);
+        setNextCursor(cursor);
+        setError('');
       } catch {
+        if (cancelled) return;
         setError('No se pudo conectar al servidor. Vuelve a intentarlo más tarde.');
         setListings([]);
+        setNextCursor(null);
       } finally {
-        setIsLoading(false);
+        if (!cancelled) setIsLoading(false);
       }
     };
 
     fetchListings();
-  }, []);
+    return () => { cancelled = true; };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [selectedCategories, debouncedQuery]);
 
   // Reset page when filters change
   useEffect(() => {
     setCurrentPage(1);
-  }, [selectedCategories, searchQuery]);
+  }, [selectedCategories, debouncedQuery]);
+
+  const loadedPages = Math.ceil(listings.length / itemsPerPage);
+
+  // Fetch the next keyset page when the user reaches the end of what is loaded.
+  useEffect(() => {
+    if (currentPage <= loadedPages || !nextCursor || isFetchingMore) return;
+    setIsFetchingMore(true);
+    fetchPage(nextCursor)
+      .then(({ items, nextCursor: cursor }) => {
+        setListings(prev => [...prev, ...items]);
+        setNextCursor(cursor);
+      })
+      .catch(() => setNextCursor(null))
+      .finally(() => setIsFetchingMore(false));
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [currentPage, loadedPages, nextCursor]);
 
   const handleCategoryChange = (category) => {
     if (category === 'RESET') {
@@ -135,21 +190,9 @@ function Home() {
 
   const dataListings = listings;
 
-  // Filter Logic
-  const filteredListings = dataListings.filter(item => {
-    const matchesCategory = selectedCategories.length === 0 || selectedCategories.includes(item.category);
-    const matchesSearch = searchQuery === "" || 
-        item.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        item.description.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        item.category.toLowerCase().includes(searchQuery.toLowerCase());
-        
-    return matchesCategory && matchesSearch;
-  });
-
-  // 2. Paginate
-  const itemsPerPage = 6;
-  const totalPages = Math.max(1, Math.ceil(filteredListings.length / itemsPerPage));
-  const currentListings = filteredListings.slice(
+  // Paginate the loaded pages; one extra page is offered while the server has more.
+  const totalPages = Math.max(1, loadedPages + (nextCursor ? 1 : 0));
+  const currentListings = dataListings.slice(
     (currentPage - 1) * itemsPerPage,
     currentPage * itemsPerPage
   );
@@ -226,7 +269,7 @@ function Home() {
                         onContact={() => setSelectedListing(listing)}
                       />
                     ))
-                ) : (
+                ) : isFetchingMore ? null : (
                     <div className="col-span-full py-12 text-center text-slate-500">
                         <div className="inline-flex items-center justify-center w-16 h-16 rounded-full bg-slate-100 mb-4">
                             <svg className="w-8 h-8 text-slate-400" fill="none" viewBox="0 0 24 24" stroke="currentColor">
@@ -22,25 +22,6 @@ const ParentingAcademy = () => {
     'https://images.unsplash.com/photo-1524504388940-b1c1722653e1?auto=format&fit=crop&w=900&q=80',
   ];
 
-  const fetchMeta = async (url, idx = 0) => {
-    try {
-      const res = await fetch(`https://noembed.com/embed?url=${encodeURIComponent(url)}`);
-      if (res.ok) {
-        const d = await res.json();
-        return {
-          title: d.title || 'Video',
-          thumbnail: d.thumbnail_url || fallbackThumbs[idx % fallbackThumbs.length],
-        };
-      }
-    } catch (e) {
-      console.warn('oEmbed error', e);
-    }
-    return {
-      title: 'Video',
-      thumbnail: fallbackThumbs[idx % fallbackThumbs.length],
-    };
-  };
-
   const toEmbedUrl = (url) => {
     if (!url) return null;
     try {
@@ -60,19 +41,15 @@ const ParentingAcademy = () => {
         const res = await fetch(`${API_BASE}/videos`);
         if (!res.ok) throw new Error('failed');
         const data = await res.json();
-        const enrichedData = await Promise.all(
-          data.map(async (video, idx) => {
-            const meta = await fetchMeta(video.url, idx);
-            return {
-              id: video.id,
-              url: video.url,
-              title: meta.title,
-              thumbnail: meta.thumbnail,
-              tagKey: tagKeys[idx % 4],
-              color: ["bg-yellow-300", "bg-pink-300", "bg-green-300", "bg-purple-300", "bg-blue-300", "bg-orange-300"][idx % 6]
-            };
-          })
-        );
+        // Title and thumbnail come with each row (stored by the API), no per-video lookups.
+        const enrichedData = data.map((video, idx) => ({
+          id: video.id,
+          url: video.url,
+          title: video.title || 'Video',
+          thumbnail: video.thumbnail_url || fallbackThumbs[idx % fallbackThumbs.length],
+          tagKey: tagKeys[idx % 4],
+          color: ["bg-yellow-300", "bg-pink-300", "bg-green-300", "bg-purple-300", "bg-blue-300", "bg-orange-300"][idx % 6]
+        }));
 
         setCourses(enrichedData);
       } catch (err) {
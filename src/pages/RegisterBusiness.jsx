@@ -502,9 +502,20 @@ const RegisterBusiness = () => {
         const err = await res.json().catch(() => ({}));
         throw new Error(err.error || t('register.errors.coverAi'));
       }
-      const data = await res.json();
-      setAiCoverUrl(data.cover_url);
-      setCoverPreview(data.cover_url);
+      // The backend queues the job (202) and we poll its status until it finishes.
+      let job = await res.json();
+      const deadline = Date.now() + 120000;
+      while (job.status === 'queued' || job.status === 'running') {
+        if (Date.now() > deadline) throw new Error(t('register.errors.coverAi'));
+        await new Promise(resolve => setTimeout(resolve, 1500));
+        const poll = await fetchWithTimeout(`${API_BASE}/ai/jobs/${job.job_id}`, {}, 15000, t('register.errors.coverAi'));
+        if (!poll.ok) throw new Error(t('register.errors.coverAi'));
+        job = await poll.json();
+      }
+      if (job.status !== 'done') throw new Error(job.error || t('register.errors.coverAi'));
+      const coverUrl = job.result.cover_url;
+      setAiCoverUrl(coverUrl);
+      setCoverPreview(coverUrl);
     } catch (err) {
       setFormError(err.message);
     } finally {